@@ -0,0 +1,91 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import typing
+import zipfile
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import series_reader, series_source
+
+
+def _read_frame(uri: str) -> pd.DataFrame:
+    with series_source.open_series(uri) as source:
+        return pd.read_csv(source)
+
+
+def _write_layouts(temp_dir: str, n_series: int, series_length: int) -> typing.Dict[str, str]:
+    # the same series files stored loose, gzip compressed, and packed into zip and tar archives
+    plain_dir = os.path.join(temp_dir, 'plain')
+    gzip_dir = os.path.join(temp_dir, 'gzip')
+    os.makedirs(plain_dir)
+    os.makedirs(gzip_dir)
+    names = ['{idx:06d}.csv'.format(idx=idx) for idx in range(n_series)]
+    for name in names:
+        frame = pd.DataFrame({'time': np.arange(series_length), 'value': np.random.standard_normal(series_length)})
+        frame.to_csv(os.path.join(plain_dir, name), index=False)
+        with open(os.path.join(plain_dir, name), 'rb') as source:
+            with gzip.open(os.path.join(gzip_dir, name + '.gz'), 'wb') as target:
+                shutil.copyfileobj(source, target)
+
+    with zipfile.ZipFile(os.path.join(temp_dir, 'zip.zip'), 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name in names:
+            archive.write(os.path.join(plain_dir, name), name)
+    with tarfile.open(os.path.join(temp_dir, 'tar.tar'), 'w') as archive:
+        for name in names:
+            archive.add(os.path.join(plain_dir, name), name)
+    return {layout: os.path.join(temp_dir, layout) for layout in ('plain', 'gzip', 'zip', 'tar')}
+
+
+def _disk_bytes(path: str) -> int:
+    for suffix in ('', '.zip', '.tar'):
+        if os.path.isfile(path + suffix):
+            return os.path.getsize(path + suffix)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def run(n_series: int, series_length: int, workers: int) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        layouts = _write_layouts(temp_dir, n_series, series_length)
+        names = ['{idx:06d}.csv'.format(idx=idx) for idx in range(n_series)]
+
+        print('{:>8} {:>8} {:>12} {:>12}'.format('layout', 'workers', 'disk MB', 'seconds'))
+        for layout, directory in layouts.items():
+            uris = ['file://' + os.path.join(directory, name) for name in names]
+            for n_workers in sorted({1, workers}):
+                start = time.perf_counter()
+                for _ in series_reader.iter_read(uris, _read_frame, n_workers):
+                    pass
+                elapsed = time.perf_counter() - start
+                print('{:>8} {:>8} {:>12.1f} {:>12.3f}'.format(layout, n_workers, _disk_bytes(directory) / 1e6,
+                                                               elapsed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark reading compressed and archived series files')
+    parser.add_argument('--series', type=int, default=2000)
+    parser.add_argument('--length', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    run(args.series, args.length, args.workers)
@@ -0,0 +1,65 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import downsample
+
+
+def _parse_then_downsample(csv_path: str, window: downsample.SeriesWindow) -> pd.DataFrame:
+    # the previous approach - parse every row, then select and reduce
+    series = pd.read_csv(csv_path)
+    times = series.iloc[:, 0]
+    return window.reduce(series[(times >= window.time_start) & (times < window.time_end)].reset_index(drop=True), 0)
+
+
+def run(series_length: int, window_fraction: float, stride: int) -> None:
+    # a single long series, windowed on its first `window_fraction` and reduced by `stride`
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = os.path.join(temp_dir, 'series.csv')
+        values = np.random.standard_normal(series_length)
+        pd.DataFrame({'time': np.arange(series_length), 'value': values}).to_csv(csv_path, index=False)
+        window = downsample.SeriesWindow(0, int(series_length * window_fraction), stride, 'mean')
+
+        print('{:>24} {:>12} {:>12} {:>12}'.format('method', 'rows', 'seconds', 'peak MB'))
+        for name, read in (('parse then downsample', lambda: _parse_then_downsample(csv_path, window)),
+                           ('downsample on parse', lambda: window.read_csv(csv_path, 0))):
+            # time without tracing, which slows down the chunked parse more than the single parse
+            start = time.perf_counter()
+            rows = len(read())
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            read()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print('{:>24} {:>12} {:>12.3f} {:>12.1f}'.format(name, rows, elapsed, peak / 1e6))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark time range and stride downsampling at parse time')
+    parser.add_argument('--length', type=int, default=2000000)
+    parser.add_argument('--window', type=float, default=0.25, help='fraction of each series inside the time range')
+    parser.add_argument('--stride', type=int, default=10)
+    args = parser.parse_args()
+    run(args.length, args.window, args.stride)
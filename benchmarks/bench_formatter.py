@@ -0,0 +1,60 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from timeseriesloader.timeseries_formatter import TimeSeriesFormatterPrimitive, Hyperparams
+
+from benchmarks import synthetic
+
+
+def run(series_counts: list, series_length: int, chunk_size: int = None) -> None:
+    # when chunk_size is set the output is streamed with iter_chunks, and each chunk is dropped once counted
+    hyperparams = Hyperparams.defaults().replace({'file_col_index': 1})
+    if chunk_size is not None:
+        hyperparams = hyperparams.replace({'chunk_size': chunk_size})
+    print('{:>10} {:>12} {:>12} {:>14} {:>12}'.format('series', 'rows', 'seconds', 'rows / s', 'peak MB'))
+    for n_series in series_counts:
+        with tempfile.TemporaryDirectory() as dataset_path:
+            dataset_doc_path = synthetic.write_dataset(dataset_path, n_series, series_length)
+            dataset = synthetic.load_dataset(dataset_doc_path)
+
+            formatter = TimeSeriesFormatterPrimitive(hyperparams=hyperparams)
+            tracemalloc.start()
+            start = time.perf_counter()
+            if chunk_size is None:
+                rows = formatter.produce(inputs=dataset).value['0'].shape[0]
+            else:
+                rows = sum(chunk.shape[0] for chunk in formatter.iter_chunks(inputs=dataset))
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            assert rows == n_series * series_length
+            print('{:>10} {:>12} {:>12.3f} {:>14.0f} {:>12.1f}'.format(n_series, rows, elapsed, rows / elapsed,
+                                                                       peak / 1e6))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark TimeSeriesFormatterPrimitive.produce scaling')
+    parser.add_argument('--series', type=int, nargs='+', default=[250, 500, 1000, 2000, 4000])
+    parser.add_argument('--length', type=int, default=166)
+    parser.add_argument('--chunk-size', type=int, default=None, help='stream the output in chunks of this many series')
+    args = parser.parse_args()
+    run(args.series, args.length, args.chunk_size)
@@ -0,0 +1,55 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = ('timeseriesloader.timeseries_loader', 'timeseriesloader.timeseries_formatter')
+
+
+def _time_import(statement: str) -> float:
+    # time a fresh interpreter, so nothing is shared with earlier runs
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', statement], check=True)
+    return time.perf_counter() - start
+
+
+def run(repeats: int, max_seconds: float = None) -> bool:
+    baseline = statistics.median(_time_import('import d3m.container') for _ in range(repeats))
+    statement = '; '.join('import ' + module for module in MODULES)
+    total = statistics.median(_time_import(statement) for _ in range(repeats))
+
+    print('{:<36} {:>10.3f}'.format('interpreter + d3m.container (s)', baseline))
+    print('{:<36} {:>10.3f}'.format('interpreter + both primitives (s)', total))
+    print('{:<36} {:>10.3f}'.format('primitive modules alone (s)', total - baseline))
+
+    if max_seconds is not None and total - baseline > max_seconds:
+        print('import time regression: {:.3f}s > {:.3f}s'.format(total - baseline, max_seconds))
+        return False
+    return True
+
+
+if __name__ == '__main__':
+    # the primitive modules are timed on top of d3m itself, which every worker process has to import anyway
+    parser = argparse.ArgumentParser(description='benchmark the cost of importing the primitive modules')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='exit with an error if importing the primitive modules takes longer than this')
+    args = parser.parse_args()
+    sys.exit(0 if run(args.repeats, args.max_seconds) else 1)
@@ -0,0 +1,83 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import typing
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import series_reader, series_snapshot
+
+
+def _read_arrays(path: str) -> typing.Tuple[np.ndarray, np.ndarray]:
+    series = pd.read_csv(path)
+    return series.iloc[:, 0].values, series.iloc[:, 1].values
+
+
+def _write_series(series_dir: str, start: int, end: int, series_length: int) -> typing.List[str]:
+    paths = []
+    for idx in range(start, end):
+        path = os.path.join(series_dir, '{idx:06d}.csv'.format(idx=idx))
+        pd.DataFrame({'time': np.arange(series_length),
+                      'value': np.random.standard_normal(series_length)}).to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def _incremental_read(store: series_snapshot.SnapshotStore, base_uri: str, paths: typing.List[str]) -> int:
+    incremental = store.open(base_uri, 'arrays', paths)
+    n_series = sum(1 for _ in incremental.merge(series_reader.iter_read(incremental.changed_paths(), _read_arrays)))
+    incremental.save()
+    return n_series
+
+
+def run(n_series: int, series_length: int, growth: float, days: int) -> None:
+    # a dataset that grows by `growth` of its initial size each day, read in full and incrementally
+    with tempfile.TemporaryDirectory() as temp_dir:
+        series_dir = os.path.join(temp_dir, 'timeseries')
+        os.makedirs(series_dir)
+        store = series_snapshot.SnapshotStore(os.path.join(temp_dir, 'snapshots'))
+        paths = _write_series(series_dir, 0, n_series, series_length)
+        _incremental_read(store, series_dir, paths)
+
+        print('{:>6} {:>10} {:>14} {:>14}'.format('day', 'series', 'full seconds', 'incr seconds'))
+        for day in range(1, days + 1):
+            n_new = max(1, int(n_series * growth))
+            paths += _write_series(series_dir, len(paths), len(paths) + n_new, series_length)
+
+            start = time.perf_counter()
+            for _ in series_reader.iter_read(paths, _read_arrays):
+                pass
+            full_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _incremental_read(store, series_dir, paths)
+            incremental_seconds = time.perf_counter() - start
+            print('{:>6} {:>10} {:>14.3f} {:>14.3f}'.format(day, len(paths), full_seconds, incremental_seconds))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark incremental reads of a growing dataset')
+    parser.add_argument('--series', type=int, default=5000)
+    parser.add_argument('--length', type=int, default=500)
+    parser.add_argument('--growth', type=float, default=0.01, help='fraction of the dataset added each day')
+    parser.add_argument('--days', type=int, default=3)
+    args = parser.parse_args()
+    run(args.series, args.length, args.growth, args.days)
@@ -0,0 +1,62 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import long_form
+
+
+def run(series_counts: list, series_length: int) -> None:
+    # the main resource holds strings, as loaded from a D3M dataset, and the series are already parsed
+    print('{:>10} {:>12} {:>14} {:>12} {:>12} {:>12}'.format('series', 'rows', 'layout', 'seconds', 'deep MB',
+                                                             'alloc MB'))
+    for n_series in series_counts:
+        main_resource = pd.DataFrame({
+            'd3mIndex': [str(idx) for idx in range(n_series)],
+            'timeseries_file': ['{idx:06d}_train_ts.csv'.format(idx=idx) for idx in range(n_series)],
+            'label': [str(idx % 4) for idx in range(n_series)],
+        })
+        frame = pd.DataFrame({'time': np.arange(series_length), 'value': np.random.standard_normal(series_length)})
+        series_frames = [frame] * n_series
+
+        for layout in long_form.LAYOUTS:
+            tracemalloc.start()
+            start = time.perf_counter()
+            outputs = [long_form.build_long_form(main_resource, series_frames, layout)]
+            if layout == 'side_resource':
+                outputs.append(long_form.build_series_resource(main_resource))
+            elapsed = time.perf_counter() - start
+            allocated, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            # deep memory usage counts each string once per row that holds it, as it would be once pickled or
+            # copied into another process, while the allocated memory counts strings shared between rows once
+            deep_size = sum(output.memory_usage(deep=True).sum() for output in outputs)
+            print('{:>10} {:>12} {:>14} {:>12.3f} {:>12.1f} {:>12.1f}'.format(
+                n_series, len(outputs[0]), layout, elapsed, deep_size / 1e6, allocated / 1e6))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark the memory of each long form broadcast layout')
+    parser.add_argument('--series', type=int, nargs='+', default=[500, 2000, 8000])
+    parser.add_argument('--length', type=int, default=166)
+    args = parser.parse_args()
+    run(args.series, args.length)
@@ -0,0 +1,50 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import tempfile
+import time
+
+from timeseriesloader.timeseries_loader import TimeSeriesLoaderPrimitive, Hyperparams
+
+from benchmarks import synthetic
+
+
+def run(series_counts: list, series_length: int, dtype: str) -> None:
+    hyperparams = Hyperparams.defaults().replace({'dtype': dtype})
+    print('{:>10} {:>12} {:>14}'.format('series', 'seconds', 'us / series'))
+    for n_series in series_counts:
+        with tempfile.TemporaryDirectory() as dataset_path:
+            dataset_doc_path = synthetic.write_dataset(dataset_path, n_series, series_length)
+            dataframe = synthetic.load_dataframe(dataset_doc_path)
+
+            loader = TimeSeriesLoaderPrimitive(hyperparams=hyperparams)
+            start = time.perf_counter()
+            result = loader.produce(inputs=dataframe).value
+            elapsed = time.perf_counter() - start
+
+            assert result.shape == (n_series, series_length)
+            print('{:>10} {:>12.3f} {:>14.1f}'.format(n_series, elapsed, elapsed / n_series * 1e6))
+
+
+if __name__ == '__main__':
+    # per series cost should stay flat as the series count grows
+    parser = argparse.ArgumentParser(description='benchmark TimeSeriesLoaderPrimitive.produce scaling')
+    parser.add_argument('--series', type=int, nargs='+', default=[250, 500, 1000, 2000, 4000])
+    parser.add_argument('--length', type=int, default=166)
+    parser.add_argument('--dtype', default='float64', choices=['float64', 'float32'])
+    args = parser.parse_args()
+    run(args.series, args.length, args.dtype)
@@ -0,0 +1,61 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import tempfile
+import time
+
+from timeseriesloader import timeseries_formatter, timeseries_loader
+
+from benchmarks import synthetic
+
+
+def _time_produce(primitive: object, inputs: object) -> float:
+    start = time.perf_counter()
+    primitive.produce(inputs=inputs)  # type: ignore
+    return time.perf_counter() - start
+
+
+def run(n_series: int, series_length: int) -> None:
+    # a wide loader output, and a long formatter output, with generated and directly built metadata
+    print('{:>10} {:>12} {:>12} {:>12}'.format('primitive', 'generated s', 'direct s', 'speedup'))
+    with tempfile.TemporaryDirectory() as dataset_path:
+        dataset_doc_path = synthetic.write_dataset(dataset_path, n_series, series_length)
+        dataframe = synthetic.load_dataframe(dataset_doc_path)
+        dataset = synthetic.load_dataset(dataset_doc_path)
+
+        timings = {}
+        for generate_metadata in (True, False):
+            loader = timeseries_loader.TimeSeriesLoaderPrimitive(
+                hyperparams=timeseries_loader.Hyperparams.defaults().replace(
+                    {'generate_metadata': generate_metadata}))
+            formatter = timeseries_formatter.TimeSeriesFormatterPrimitive(
+                hyperparams=timeseries_formatter.Hyperparams.defaults().replace(
+                    {'file_col_index': 1, 'generate_metadata': generate_metadata}))
+            timings[('loader', generate_metadata)] = _time_produce(loader, dataframe)
+            timings[('formatter', generate_metadata)] = _time_produce(formatter, dataset)
+
+        for name in ('loader', 'formatter'):
+            generated, direct = timings[(name, True)], timings[(name, False)]
+            print('{:>10} {:>12.3f} {:>12.3f} {:>11.1f}x'.format(name, generated, direct, generated / direct))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='compare generated and directly built output metadata')
+    parser.add_argument('--series', type=int, default=500)
+    parser.add_argument('--length', type=int, default=5000)
+    args = parser.parse_args()
+    run(args.series, args.length)
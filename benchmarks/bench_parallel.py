@@ -0,0 +1,60 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from timeseriesloader import timeseries_formatter, timeseries_loader
+
+from benchmarks import synthetic
+
+
+def _time_produce(primitive: object, inputs: object) -> float:
+    start = time.perf_counter()
+    primitive.produce(inputs=inputs)  # type: ignore
+    return time.perf_counter() - start
+
+
+def run(workers: list, backends: list) -> None:
+    # a dataset of many small files, where per file overhead dominates, and one of a few large files
+    scenarios = [('many small', 5000, 100), ('few large', 16, 200000)]
+    print('{:>12} {:>8} {:>8} {:>12} {:>12}'.format('dataset', 'backend', 'workers', 'loader s', 'formatter s'))
+    for name, n_series, series_length in scenarios:
+        with tempfile.TemporaryDirectory() as dataset_path:
+            dataset_doc_path = synthetic.write_dataset(dataset_path, n_series, series_length)
+            dataframe = synthetic.load_dataframe(dataset_doc_path)
+            dataset = synthetic.load_dataset(dataset_doc_path)
+            for backend in backends:
+                for worker_count in workers:
+                    loader = timeseries_loader.TimeSeriesLoaderPrimitive(
+                        hyperparams=timeseries_loader.Hyperparams.defaults().replace(
+                            {'workers': worker_count, 'parallel_backend': backend}))
+                    formatter = timeseries_formatter.TimeSeriesFormatterPrimitive(
+                        hyperparams=timeseries_formatter.Hyperparams.defaults().replace(
+                            {'file_col_index': 1, 'workers': worker_count, 'parallel_backend': backend}))
+                    print('{:>12} {:>8} {:>8} {:>12.3f} {:>12.3f}'.format(
+                        name, backend, worker_count, _time_produce(loader, dataframe),
+                        _time_produce(formatter, dataset)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark concurrent series file reads in both primitives')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, os.cpu_count() or 1])
+    parser.add_argument('--backends', nargs='+', default=['thread', 'process'], choices=['thread', 'process', 'async'])
+    args = parser.parse_args()
+    run(args.workers, args.backends)
@@ -0,0 +1,107 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+import typing
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import series_reader, series_source
+
+
+def _serve(directory: str, latency: float, connections: typing.Any, ports: typing.Any) -> None:
+    # a keep-alive http server for the files of a directory, delaying each response to stand in for remote
+    # storage.  It runs on its own event loop in a separate process, so that delayed responses overlap and the
+    # server doesn't compete with the reader for the interpreter lock
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        with connections.get_lock():
+            connections.value += 1
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            keep_alive = True
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'connection:') and b'close' in line.lower():
+                    keep_alive = False
+
+            await asyncio.sleep(latency)
+            with open(os.path.join(directory, request_line.split()[1].decode('ascii').lstrip('/')), 'rb') as series:
+                content = series.read()
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: ' + str(len(content)).encode('ascii') +
+                         b'\r\n\r\n' + content)
+            await writer.drain()
+            if not keep_alive:
+                break
+        writer.close()
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handle, '127.0.0.1', 0))
+    ports.put(server.sockets[0].getsockname()[1])
+    loop.run_forever()
+
+
+def _read_frame(uri: str) -> pd.DataFrame:
+    with series_source.open_series(uri) as source:
+        return pd.read_csv(source)
+
+
+def run(n_series: int, series_length: int, latency: float, workers: typing.List[int]) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        names = ['{idx:06d}.csv'.format(idx=idx) for idx in range(n_series)]
+        for name in names:
+            pd.DataFrame({'time': np.arange(series_length),
+                          'value': np.random.standard_normal(series_length)}).to_csv(os.path.join(temp_dir, name),
+                                                                                     index=False)
+
+        print('{:>8} {:>8} {:>12} {:>12}'.format('backend', 'workers', 'connections', 'seconds'))
+        for backend in ('thread', 'async'):
+            for worker_count in workers:
+                connections = multiprocessing.Value('i', 0)
+                ports: multiprocessing.Queue = multiprocessing.Queue()
+                server = multiprocessing.Process(target=_serve, args=(temp_dir, latency, connections, ports),
+                                                 daemon=True)
+                server.start()
+                port = ports.get()
+                uris = ['http://127.0.0.1:{port}/{name}'.format(port=port, name=name) for name in names]
+                try:
+                    start = time.perf_counter()
+                    for _ in series_reader.iter_read(uris, _read_frame, worker_count, backend):
+                        pass
+                    elapsed = time.perf_counter() - start
+                finally:
+                    server.terminate()
+                    server.join()
+                print('{:>8} {:>8} {:>12} {:>12.3f}'.format(backend, worker_count, connections.value, elapsed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark reading series from an http server with added latency')
+    parser.add_argument('--series', type=int, default=400)
+    parser.add_argument('--length', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds added to each response')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+    run(args.series, args.length, args.latency, args.workers)
@@ -0,0 +1,113 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+from benchmarks import synthetic
+
+# name: (series count, series length, columns, irregularity)
+SCALES = {
+    'small': (100, 1000, 2, 0.0),
+    'medium': (2000, 1000, 2, 0.0),
+    'large': (20000, 1000, 2, 0.0),
+    'wide': (500, 20000, 2, 0.0),
+    'multicolumn': (2000, 1000, 8, 0.0),
+    'irregular': (2000, 1000, 2, 0.2),
+}
+
+PRIMITIVES = ('loader', 'formatter')
+
+
+def measure(primitive: str, dataset_doc_path: str, irregular: bool) -> typing.Dict[str, float]:
+    # run one primitive over a dataset in this process, returning its wall time and the peak resident size
+    from timeseriesloader import timeseries_formatter, timeseries_loader
+
+    if primitive == 'loader':
+        inputs: typing.Any = synthetic.load_dataframe(dataset_doc_path)
+        hyperparams = timeseries_loader.Hyperparams.defaults()
+        if irregular:
+            hyperparams = hyperparams.replace({'alignment': 'union'})
+        instance: typing.Any = timeseries_loader.TimeSeriesLoaderPrimitive(hyperparams=hyperparams)
+    else:
+        inputs = synthetic.load_dataset(dataset_doc_path)
+        hyperparams = timeseries_formatter.Hyperparams.defaults().replace({'file_col_index': 1})
+        instance = timeseries_formatter.TimeSeriesFormatterPrimitive(hyperparams=hyperparams)
+
+    start = time.perf_counter()
+    instance.produce(inputs=inputs)
+    seconds = time.perf_counter() - start
+
+    # linux reports kilobytes, macos bytes
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / 1e6 if sys.platform == 'darwin' else peak_rss / 1e3
+    return {'seconds': seconds, 'peak_rss_mb': peak_rss_mb}
+
+
+def run(scales: typing.Sequence[str], primitives: typing.Sequence[str]) -> typing.List[typing.Dict[str, typing.Any]]:
+    results = []
+    print('{:>12} {:>10} {:>10} {:>12} {:>12} {:>12}'.format(
+        'scale', 'primitive', 'seconds', 'peak RSS MB', 'series / s', 'MB / s'))
+    for scale in scales:
+        n_series, series_length, n_columns, irregularity = SCALES[scale]
+        with tempfile.TemporaryDirectory() as dataset_path:
+            dataset_doc_path = synthetic.write_dataset(dataset_path, n_series, series_length, n_columns, irregularity)
+            timeseries_path = os.path.join(dataset_path, 'timeseries')
+            dataset_mb = sum(entry.stat().st_size for entry in os.scandir(timeseries_path)) / 1e6
+
+            for primitive in primitives:
+                # each measurement gets a fresh process so peak memory isn't carried over between runs
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.suite', '--measure', primitive, dataset_doc_path]
+                    + (['--irregular'] if irregularity > 0 else []),
+                    check=True, stdout=subprocess.PIPE).stdout
+                result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+                result.update({
+                    'scale': scale,
+                    'primitive': primitive,
+                    'series_per_second': n_series / result['seconds'],
+                    'mb_per_second': dataset_mb / result['seconds'],
+                })
+                results.append(result)
+                print('{scale:>12} {primitive:>10} {seconds:>10.3f} {peak_rss_mb:>12.1f} '
+                      '{series_per_second:>12.0f} {mb_per_second:>12.1f}'.format(**result))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark both primitives across dataset scales')
+    parser.add_argument('--scales', nargs='+', default=['small', 'medium', 'wide', 'multicolumn', 'irregular'],
+                        choices=sorted(SCALES))
+    parser.add_argument('--primitives', nargs='+', default=list(PRIMITIVES), choices=PRIMITIVES)
+    parser.add_argument('--output', default=None, help='also write the results to this json file')
+    parser.add_argument('--measure', nargs=2, metavar=('PRIMITIVE', 'DATASET_DOC'), help=argparse.SUPPRESS)
+    parser.add_argument('--irregular', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure[0], args.measure[1], args.irregular)))
+    else:
+        suite_results = run(args.scales, args.primitives)
+        if args.output:
+            with open(args.output, 'w') as output_file:
+                json.dump(suite_results, output_file, indent=2)
@@ -0,0 +1,136 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import argparse
+import json
+import os
+import typing
+
+import numpy as np  # type: ignore
+
+from d3m import container
+from d3m.metadata import base as metadata_base
+
+
+def write_dataset(dataset_path: str,
+                  n_series: int,
+                  series_length: int,
+                  n_columns: int = 2,
+                  irregularity: float = 0.0,
+                  seed: int = 0) -> str:
+    """
+    Writes a D3M style time series dataset to `dataset_path`, containing `n_series` series files of
+    `series_length` rows each, and returns the path of its datasetDoc.json.  Each series file has a time
+    column followed by `n_columns - 1` value columns.  When `irregularity` is greater than 0, that fraction
+    of each series' timestamps is dropped at random, giving series of differing lengths and timestamps.
+    """
+    if n_columns < 2:
+        raise ValueError('series files need a time column and at least one value column')
+
+    rng = np.random.RandomState(seed)
+    timeseries_path = os.path.join(dataset_path, 'timeseries')
+    tables_path = os.path.join(dataset_path, 'tables')
+    os.makedirs(timeseries_path, exist_ok=True)
+    os.makedirs(tables_path, exist_ok=True)
+
+    header = ','.join(['time', 'value'] + ['value_{idx}'.format(idx=idx) for idx in range(1, n_columns - 1)])
+    fmt = ['%d'] + ['%.4f'] * (n_columns - 1)
+    all_times = np.arange(series_length)
+    with open(os.path.join(tables_path, 'learningData.csv'), 'w') as learning_data:
+        learning_data.write('d3mIndex,timeseries_file,label\n')
+        for idx in range(n_series):
+            file_name = '{idx:06d}_train_ts.csv'.format(idx=idx)
+            learning_data.write('{idx},{file_name},{label}\n'.format(idx=idx, file_name=file_name, label=idx % 4))
+
+            times = all_times
+            if irregularity > 0:
+                times = all_times[rng.random_sample(series_length) >= irregularity]
+            values = rng.standard_normal((len(times), n_columns - 1))
+            np.savetxt(os.path.join(timeseries_path, file_name), np.column_stack((times, values)),
+                       fmt=fmt, delimiter=',', header=header, comments='')
+
+    dataset_doc_path = os.path.join(dataset_path, 'datasetDoc.json')
+    with open(dataset_doc_path, 'w') as dataset_doc:
+        json.dump(_dataset_doc(), dataset_doc, indent=2)
+    return dataset_doc_path
+
+
+def load_dataset(dataset_doc_path: str) -> container.Dataset:
+    dataset_doc_path = os.path.abspath(dataset_doc_path)
+    return container.Dataset.load('file://{dataset_doc_path}'.format(dataset_doc_path=dataset_doc_path))
+
+
+def load_dataframe(dataset_doc_path: str) -> container.DataFrame:
+    # load the main resource and add the metadata the DatasetToDataframe primitive would typically add
+    dataset = load_dataset(dataset_doc_path)
+    dataframe = dataset['1']
+    base_file_path = 'file://' + os.path.join(os.path.dirname(os.path.abspath(dataset_doc_path)), 'timeseries/')
+    dataframe.metadata = dataframe.metadata.generate(dataframe)
+    dataframe.metadata = dataframe.metadata. \
+        add_semantic_type((metadata_base.ALL_ELEMENTS, 1), 'https://metadata.datadrivendiscovery.org/types/FileName')
+    dataframe.metadata = dataframe.metadata. \
+        add_semantic_type((metadata_base.ALL_ELEMENTS, 1), 'https://metadata.datadrivendiscovery.org/types/Timeseries')
+    dataframe.metadata = dataframe.metadata.update((metadata_base.ALL_ELEMENTS, 1), {'media_types': ('text/csv',)})
+    dataframe.metadata = dataframe.metadata.update((metadata_base.ALL_ELEMENTS, 1),
+                                                   {'location_base_uris': (base_file_path,)})
+    return dataframe
+
+
+def _dataset_doc() -> typing.Dict[str, typing.Any]:
+    return {
+        'about': {
+            'datasetID': 'synthetic_timeseries',
+            'datasetName': 'Synthetic Time Series',
+            'license': 'Unknown public',
+            'datasetSchemaVersion': '3.1.2',
+            'redacted': False,
+            'datasetVersion': '1.0'
+        },
+        'dataResources': [
+            {
+                'resID': '0',
+                'resPath': 'timeseries/',
+                'resType': 'timeseries',
+                'resFormat': ['text/csv'],
+                'isCollection': True
+            },
+            {
+                'resID': '1',
+                'resPath': 'tables/learningData.csv',
+                'resType': 'table',
+                'resFormat': ['text/csv'],
+                'isCollection': False,
+                'columns': [
+                    {'colIndex': 0, 'colName': 'd3mIndex', 'colType': 'integer', 'role': ['index']},
+                    {'colIndex': 1, 'colName': 'timeseries_file', 'colType': 'string', 'role': ['attribute'],
+                     'refersTo': {'resID': '0', 'resObject': 'item'}},
+                    {'colIndex': 2, 'colName': 'label', 'colType': 'categorical', 'role': ['suggestedTarget']}
+                ]
+            }
+        ]
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='write a synthetic D3M time series dataset')
+    parser.add_argument('dataset_path')
+    parser.add_argument('--series', type=int, default=1000)
+    parser.add_argument('--length', type=int, default=1000)
+    parser.add_argument('--columns', type=int, default=2)
+    parser.add_argument('--irregularity', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print(write_dataset(args.dataset_path, args.series, args.length, args.columns, args.irregularity, args.seed))
@@ -16,5 +16,8 @@ setup(
             'data_preprocessing.timeseries_loader.DistilTimeSeriesLoader = timeseriesloader.timeseries_loader:TimeSeriesLoaderPrimitive',
             'data_preprocessing.timeseries_formatter.DistilTimeSeriesFormatter = timeseriesloader.timeseries_formatter:TimeSeriesFormatterPrimitive'
         ],
+        'console_scripts': [
+            'distil-pack-timeseries = timeseriesloader.series_store:main'
+        ],
     }
 )
@@ -0,0 +1,71 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import threading
+import time
+import typing
+import unittest
+
+from timeseriesloader import deadline, series_reader
+
+
+class DeadlineTestCase(unittest.TestCase):
+
+    def test_iterations(self) -> None:
+        progress = deadline.Deadline(iterations=3)
+        self.assertListEqual(list(progress.take(iter(range(10)))), [0, 1, 2])
+        self.assertEqual(progress.iterations_done, 3)
+
+        # without limits every item is taken
+        progress = deadline.Deadline()
+        self.assertListEqual(list(progress.take(iter(range(10)))), list(range(10)))
+        self.assertFalse(progress.reached())
+
+    def test_timeout(self) -> None:
+        # an expired deadline still takes one item, so every call makes progress
+        progress = deadline.Deadline(timeout=0)
+        self.assertListEqual(list(progress.take(iter(range(10)))), [0])
+
+        def slow_items() -> typing.Iterator[int]:
+            for item in range(10):
+                time.sleep(0.02)
+                yield item
+
+        progress = deadline.Deadline(timeout=0.05)
+        taken = list(progress.take(slow_items()))
+        self.assertGreater(len(taken), 0)
+        self.assertLess(len(taken), 10)
+
+    def test_cancel_reads(self) -> None:
+        read_paths = []
+        lock = threading.Lock()
+
+        def read_fn(path: str) -> str:
+            time.sleep(0.01)
+            with lock:
+                read_paths.append(path)
+            return path
+
+        # stopping early cancels the reads still queued on the pool
+        paths = [str(idx) for idx in range(200)]
+        progress = deadline.Deadline(iterations=2)
+        results = list(progress.take(series_reader.iter_read(paths, read_fn, workers=2)))
+        self.assertListEqual(results, [(0, '0'), (1, '1')])
+        self.assertLess(len(read_paths), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import downsample
+
+
+class SeriesWindowTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # long enough to be parsed in several chunks
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._csv_path = os.path.join(self._temp_dir.name, 'series.csv')
+        n_rows = 150000
+        values = np.arange(n_rows) * 0.5
+        values[7::11] = np.nan
+        self._series = pd.DataFrame({'time': np.arange(n_rows), 'value': values, 'tag': ['a', 'b'] * (n_rows // 2)})
+        self._series.to_csv(self._csv_path, index=False)
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_aggregations(self) -> None:
+        in_range = self._series[(self._series['time'] >= 1000) & (self._series['time'] < 140000)]
+        groups = in_range.reset_index(drop=True).groupby(np.arange(len(in_range)) // 7)
+
+        for aggregation in downsample.AGGREGATIONS:
+            window = downsample.SeriesWindow(1000, 140000, 7, aggregation)
+            series = window.read_csv(self._csv_path, 0)
+
+            # first and last take the value of a single row, even when it is missing
+            expected = groups.agg({'time': 'first', 'value': aggregation, 'tag': 'first'})
+            if aggregation == 'first':
+                expected['value'] = groups['value'].apply(lambda values: values.values[0])
+            elif aggregation == 'last':
+                expected['value'] = groups['value'].apply(lambda values: values.values[-1])
+            self.assertListEqual(list(series.columns), ['time', 'value', 'tag'])
+            self.assertListEqual(list(series['time']), list(expected['time']))
+            self.assertListEqual(list(series['tag']), list(expected['tag']))
+            self.assertTrue(np.allclose(series['value'], expected['value'], equal_nan=True), aggregation)
+
+    def test_no_window(self) -> None:
+        window = downsample.SeriesWindow()
+        self.assertFalse(window.active)
+        self.assertEqual(window.spec(), '')
+        self.assertTrue(window.read_csv(self._csv_path, 0).equals(pd.read_csv(self._csv_path)))
+
+        # a window past the end of the series keeps no rows, but keeps the columns
+        series = downsample.SeriesWindow(time_start=10 ** 9).read_csv(self._csv_path, 0)
+        self.assertListEqual(list(series.columns), ['time', 'value', 'tag'])
+        self.assertEqual(len(series), 0)
+
+    def test_empty(self) -> None:
+        # a file with a header but no data rows keeps its columns
+        empty_path = os.path.join(self._temp_dir.name, 'empty.csv')
+        with open(empty_path, 'w') as empty_file:
+            empty_file.write('time,value,tag\n')
+        windows = (downsample.SeriesWindow(time_start=1000), downsample.SeriesWindow(stride=7, aggregation='mean'))
+        for window in windows:
+            series = window.read_csv(empty_path, 0, usecols=[0, 1], dtype={1: 'float64'})
+            self.assertListEqual(list(series.columns), ['time', 'value'])
+            self.assertEqual(len(series), 0)
+            self.assertEqual(series['value'].dtype, np.float64)
+
+    def test_apply(self) -> None:
+        # series already in memory are windowed the same way as parsed files
+        window = downsample.SeriesWindow(10, 40000, 3, 'max')
+        expected = window.read_csv(self._csv_path, 0)
+        times, values = window.apply(self._series['time'].values, self._series['value'].values)
+        self.assertListEqual(list(times), list(expected['time']))
+        self.assertTrue(np.allclose(values, expected['value'], equal_nan=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import unittest
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import long_form
+
+
+class LongFormTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._main_resource = pd.DataFrame({
+            'd3mIndex': ['10', '11', '12'],
+            'timeseries_file': ['a.csv', 'b.csv', 'c.csv'],
+            'label': ['1', None, '1'],
+        }, index=[4, 5, 6])
+        self._frames = [pd.DataFrame({'time': np.arange(length), 'value': np.arange(length) * 0.5})
+                        for length in (3, 2, 4)]
+
+    def test_layouts(self) -> None:
+        dense = long_form.build_long_form(self._main_resource, self._frames)
+        self.assertListEqual(list(dense.columns), ['d3mIndex', 'timeseries_file', 'label', 'series_id', 'time',
+                                                   'value'])
+        self.assertListEqual(list(dense['series_id']), [4, 4, 4, 5, 5, 6, 6, 6, 6])
+
+        # categorical output holds the same values, with the strings stored once per distinct value
+        categorical = long_form.build_long_form(self._main_resource, self._frames, 'categorical')
+        self.assertListEqual(list(categorical.columns), list(dense.columns))
+        self.assertEqual(categorical['label'].dtype.name, 'category')
+        self.assertListEqual(list(categorical['label'].cat.categories), ['1'])
+        self.assertTrue(categorical['label'].isnull().equals(dense['label'].isnull()))
+        self.assertTrue(categorical.astype(object).fillna('').equals(dense.astype(object).fillna('')))
+
+        # the side resource layout keeps one row per series, joined on series_id
+        narrow = long_form.build_long_form(self._main_resource, self._frames, 'side_resource')
+        self.assertListEqual(list(narrow.columns), ['series_id', 'time', 'value'])
+        series_resource = long_form.build_series_resource(self._main_resource)
+        self.assertListEqual(list(series_resource['series_id']), [4, 5, 6])
+        joined = narrow.merge(series_resource, on='series_id')[list(dense.columns)]
+        self.assertTrue(joined.fillna('').equals(dense.fillna('')))
+
+    def test_empty(self) -> None:
+        for layout in long_form.LAYOUTS:
+            self.assertEqual(len(long_form.build_long_form(self._main_resource.iloc[:0], [], layout)), 0)
+        with self.assertRaises(ValueError):
+            long_form.build_long_form(self._main_resource, self._frames, 'wide')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import subprocess
+import unittest
+
+from timeseriesloader import package_info
+
+
+class PackageInfoTestCase(unittest.TestCase):
+
+    def test_git_commit(self) -> None:
+        # matches what git reports for the checkout the package is imported from
+        package_path = os.path.dirname(package_info.__file__)
+        try:
+            expected = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=package_path).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            self.skipTest('package is not in a git checkout')
+        self.assertEqual(package_info.git_commit(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
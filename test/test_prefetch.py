@@ -0,0 +1,228 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import gzip
+import http.server
+import os
+import shutil
+import socketserver
+import tempfile
+import threading
+import time
+import typing
+import unittest
+
+import pandas as pd  # type: ignore
+
+from timeseriesloader import prefetch, series_reader, series_source
+
+
+class _SeriesServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    # serves the files of a directory over keep-alive connections, counting connections and concurrent requests
+    daemon_threads = True
+
+    def __init__(self, directory: str, latency: float = 0.0) -> None:
+        super().__init__(('127.0.0.1', 0), _SeriesHandler)
+        self.directory = directory
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def handle_error(self, request: typing.Any, client_address: typing.Any) -> None:
+        # connections dropped by a closed prefetch are expected
+        pass
+
+    @property
+    def base_uri(self) -> str:
+        return 'http://127.0.0.1:{port}/'.format(port=self.server_address[1])
+
+
+class _SeriesHandler(http.server.BaseHTTPRequestHandler):
+    # headers and body are written separately, so nagle is disabled as servers do for keep-alive connections
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    server: _SeriesServer
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+        try:
+            time.sleep(self.server.latency)
+            path = os.path.join(self.server.directory, self.path.lstrip('/'))
+            if os.path.basename(path).startswith('stalled_'):
+                # never answers within the timeouts of the tests
+                time.sleep(2.0)
+                return
+            if not os.path.isfile(path):
+                self.send_error(404)
+                return
+            with open(path, 'rb') as series_file:
+                content = series_file.read()
+
+            # files named chunked_* are sent with chunked transfer encoding
+            self.send_response(200)
+            if os.path.basename(path).startswith('chunked_'):
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for start in range(0, len(content), 100):
+                    chunk = content[start:start + 100]
+                    self.wfile.write('{size:x}\r\n'.format(size=len(chunk)).encode('ascii') + chunk + b'\r\n')
+                self.wfile.write(b'0\r\n\r\n')
+            else:
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+        finally:
+            with self.server.lock:
+                self.server.active -= 1
+
+    def log_message(self, format: str, *args: typing.Any) -> None:
+        pass
+
+
+def _fetched(uri: str) -> str:
+    return uri
+
+
+def _read_frame(uri: str) -> pd.DataFrame:
+    with series_source.open_series(uri) as source:
+        return pd.read_csv(source)
+
+
+class PrefetchTestCase(unittest.TestCase):
+
+    _timeseries_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'dataset', 'timeseries'))
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._names = []
+        for idx in range(24):
+            name = '{idx:04d}.csv'.format(idx=idx)
+            shutil.copyfile(os.path.join(self._timeseries_path, '{idx:04d}_train_ts.csv'.format(idx=idx % 4)),
+                            os.path.join(self._temp_dir.name, name))
+            self._names.append(name)
+        self._server = self._start_server()
+
+    def tearDown(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._temp_dir.cleanup()
+
+    def _start_server(self, latency: float = 0.0) -> _SeriesServer:
+        server = _SeriesServer(self._temp_dir.name, latency)
+        threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        return server
+
+    def _content(self, name: str) -> bytes:
+        with open(os.path.join(self._temp_dir.name, name), 'rb') as series_file:
+            return series_file.read()
+
+    def test_http(self) -> None:
+        uris = [self._server.base_uri + name for name in self._names]
+        results = list(prefetch.iter_prefetch(uris, _fetched, concurrency=4))
+        self.assertListEqual([idx for idx, _ in results], list(range(len(uris))))
+        for (_, fetched), uri, name in zip(results, uris, self._names):
+            self.assertIsInstance(fetched, series_source.Prefetched)
+            self.assertEqual(fetched, uri)
+            self.assertEqual(fetched.content, self._content(name))
+
+        # connections are reused across files rather than opened per file
+        self.assertEqual(self._server.requests, len(uris))
+        self.assertLessEqual(self._server.connections, 4)
+
+    def test_concurrency(self) -> None:
+        server = self._start_server(latency=0.02)
+        try:
+            uris = [server.base_uri + name for name in self._names]
+            self.assertEqual(len(list(prefetch.iter_prefetch(uris, _fetched, concurrency=6))), len(uris))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # requests overlap, but never more than the concurrency limit
+        self.assertLessEqual(server.max_active, 6)
+        self.assertGreater(server.max_active, 1)
+
+    def test_chunked_and_errors(self) -> None:
+        os.rename(os.path.join(self._temp_dir.name, self._names[1]),
+                  os.path.join(self._temp_dir.name, 'chunked_' + self._names[1]))
+        uris = [self._server.base_uri + name for name in ('missing.csv', 'chunked_' + self._names[1])]
+        results = dict(prefetch.iter_prefetch(uris, _fetched, concurrency=2))
+        self.assertIsInstance(results[0], OSError)
+        self.assertEqual(results[1].content, self._content('chunked_' + self._names[1]))
+
+    def test_timeout(self) -> None:
+        uris = [self._server.base_uri + name for name in ('stalled_' + self._names[0], self._names[1])]
+        start = time.perf_counter()
+        results = dict(prefetch.iter_prefetch(uris, _fetched, concurrency=2, timeout=0.2))
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIsInstance(results[0], TimeoutError)
+        self.assertEqual(results[1].content, self._content(self._names[1]))
+
+    def test_local(self) -> None:
+        # plain files are read ahead, while compressed files are left to be opened when parsed
+        with open(os.path.join(self._temp_dir.name, self._names[0]), 'rb') as source:
+            with gzip.open(os.path.join(self._temp_dir.name, 'compressed.csv.gz'), 'wb') as target:
+                shutil.copyfileobj(source, target)
+        uris = ['file://' + os.path.join(self._temp_dir.name, name) for name in (self._names[0], 'compressed.csv')]
+        results = dict(prefetch.iter_prefetch(uris, _fetched, concurrency=2))
+        self.assertEqual(results[0].content, self._content(self._names[0]))
+        self.assertNotIsInstance(results[1], series_source.Prefetched)
+        pd.testing.assert_frame_equal(_read_frame(results[1]), _read_frame(results[0]))
+
+    def test_early_close(self) -> None:
+        server = self._start_server(latency=0.05)
+        try:
+            uris = [server.base_uri + name for name in self._names]
+            fetches = prefetch.iter_prefetch(uris, _fetched, concurrency=2, read_ahead=4)
+            next(fetches)
+            start = time.perf_counter()
+            fetches.close()
+            self.assertLess(time.perf_counter() - start, 0.05 * len(uris) / 2)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # nothing past the read ahead window of the consumed file was fetched
+        self.assertLessEqual(server.requests, 5)
+
+    def test_iter_read(self) -> None:
+        uris = [self._server.base_uri + name for name in self._names]
+        expected = [pd.read_csv(os.path.join(self._temp_dir.name, name)) for name in self._names]
+        results = list(series_reader.iter_read(uris + uris[:2], _read_frame, workers=4, backend='async'))
+        self.assertListEqual([idx for idx, _ in results], list(range(len(uris) + 2)))
+        for (_, frame), expected_frame in zip(results, expected + expected[:2]):
+            pd.testing.assert_frame_equal(frame, expected_frame)
+
+        # failed fetches are raised together once the other files have been read
+        with self.assertRaises(series_reader.SeriesReadError) as context:
+            list(series_reader.iter_read(uris[:3] + [self._server.base_uri + 'missing.csv'], _read_frame,
+                                         workers=4, backend='async'))
+        self.assertEqual(len(context.exception.errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import unittest
+
+import numpy as np  # type: ignore
+
+from timeseriesloader.ragged import RaggedSeries
+
+
+class RaggedSeriesTestCase(unittest.TestCase):
+
+    def _ragged(self) -> RaggedSeries:
+        # series arrive out of order, with different lengths and timestamps
+        return RaggedSeries.from_series([
+            (1, (np.array([0, 2, 4]), np.array([1.0, 2.0, 3.0]))),
+            (0, (np.array([1, 2]), np.array([5.0, 6.0]))),
+            (2, (np.array([5]), np.array([7.0]))),
+        ], 3)
+
+    def test_series(self) -> None:
+        series = self._ragged()
+        self.assertEqual(len(series), 3)
+        self.assertListEqual(list(series.offsets), [0, 2, 5, 6])
+        self.assertListEqual(list(series.lengths), [2, 3, 1])
+
+        times, values = series.series(1)
+        self.assertListEqual(list(times), [0, 2, 4])
+        self.assertListEqual(list(values), [1.0, 2.0, 3.0])
+
+    def test_to_dense(self) -> None:
+        timestamps, matrix = self._ragged().to_dense()
+        self.assertListEqual(list(timestamps), [0, 1, 2, 4, 5])
+        np.testing.assert_array_equal(matrix, [
+            [np.nan, 5.0, 6.0, np.nan, np.nan],
+            [1.0, np.nan, 2.0, 3.0, np.nan],
+            [np.nan, np.nan, np.nan, np.nan, 7.0],
+        ])
+
+    def test_to_dense_channels(self) -> None:
+        series = RaggedSeries.from_series([
+            (0, (np.array([1, 2]), np.array([[5.0, -5.0], [6.0, -6.0]]))),
+            (1, (np.array([0, 2]), np.array([[1.0, -1.0], [2.0, -2.0]]))),
+        ], 2)
+        timestamps, tensor = series.to_dense()
+        self.assertListEqual(list(timestamps), [0, 1, 2])
+        self.assertEqual(tensor.shape, (2, 3, 2))
+        np.testing.assert_array_equal(tensor[:, :, 0], [[np.nan, 5.0, 6.0], [1.0, np.nan, 2.0]])
+        np.testing.assert_array_equal(tensor[:, :, 1], -tensor[:, :, 0])
+
+    def test_invalid_offsets(self) -> None:
+        with self.assertRaises(ValueError):
+            RaggedSeries(np.arange(3), np.zeros(3), np.array([0, 2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
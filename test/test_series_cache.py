@@ -0,0 +1,112 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import series_cache, series_reader
+
+
+class SeriesCacheTestCase(unittest.TestCase):
+
+    _timeseries_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'dataset', 'timeseries'))
+
+    def setUp(self) -> None:
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self._paths = ['file://' + os.path.join(self._timeseries_path, '{idx:04d}_train_ts.csv'.format(idx=idx))
+                       for idx in range(4)]
+
+    def tearDown(self) -> None:
+        self._cache_dir.cleanup()
+
+    def test_hits(self) -> None:
+        cache = series_cache.SeriesCache(self._cache_dir.name, 1024 * 1024)
+        first = list(series_reader.iter_read(self._paths, pd.read_csv, cache=cache, cache_spec='frame'))
+        self.assertEqual(cache.stats()['misses'], 4)
+        self.assertEqual(cache.stats()['hits'], 0)
+
+        # a new cache over the same directory serves every file without parsing
+        cache = series_cache.SeriesCache(self._cache_dir.name, 1024 * 1024)
+        second = list(series_reader.iter_read(self._paths, pd.read_csv, cache=cache, cache_spec='frame'))
+        self.assertEqual(cache.stats()['hits'], 4)
+        self.assertEqual(cache.stats()['misses'], 0)
+        for (first_idx, first_frame), (second_idx, second_frame) in zip(first, second):
+            self.assertEqual(first_idx, second_idx)
+            pd.testing.assert_frame_equal(first_frame, second_frame)
+
+        # entries are keyed on the extracted columns as well as the file
+        list(series_reader.iter_read(self._paths, pd.read_csv, cache=cache, cache_spec='other'))
+        self.assertEqual(cache.stats()['misses'], 4)
+
+    def test_eviction(self) -> None:
+        cache = series_cache.SeriesCache(self._cache_dir.name, 1024 * 1024)
+        keys = [cache.key(path, 'arrays') for path in self._paths]
+        for key in keys:
+            cache.put(key, (np.arange(100), np.zeros(100)))
+        entry_size = cache.size // 4
+        for idx, key in enumerate(keys):
+            os.utime(os.path.join(self._cache_dir.name, key), (1000 + idx, 1000 + idx))
+
+        # touching the first entry makes the second the least recently used
+        cache = series_cache.SeriesCache(self._cache_dir.name, entry_size * 3)
+        self.assertIsNotNone(cache.get(keys[0]))
+        cache.put(keys[0], (np.arange(100), np.zeros(100)))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertFalse(cache.contains(keys[1]))
+        self.assertTrue(cache.contains(keys[0]))
+        self.assertEqual(len(os.listdir(self._cache_dir.name)), 3)
+
+    def test_evicted_read_error(self) -> None:
+        cache = series_cache.SeriesCache(self._cache_dir.name, 1024 * 1024)
+        list(series_reader.iter_read(self._paths, pd.read_csv, cache=cache, cache_spec='frame'))
+
+        # the entry of the second file disappears after the lookup, and reading the file again fails
+        def read_fn(path: str) -> pd.DataFrame:
+            if path == self._paths[1]:
+                raise OSError('unreadable')
+            return pd.read_csv(path)
+
+        cache = series_cache.SeriesCache(self._cache_dir.name, 1024 * 1024)
+        os.remove(os.path.join(self._cache_dir.name, cache.key(self._paths[1], 'frame')))
+        missing = 'file://' + os.path.join(self._cache_dir.name, 'missing.csv')
+        results = []
+        with self.assertRaises(series_reader.SeriesReadError) as context:
+            for idx, _ in series_reader.iter_read(self._paths + [missing], read_fn, cache=cache, cache_spec='frame'):
+                results.append(idx)
+
+        # the failed fallback read is reported along with the failed miss, and the other files are still read
+        self.assertListEqual(results, [0, 2, 3])
+        self.assertListEqual(sorted(path for path, _ in context.exception.errors), sorted([self._paths[1], missing]))
+
+    def test_changed_file(self) -> None:
+        with tempfile.TemporaryDirectory() as data_dir:
+            path = os.path.join(data_dir, 'series.csv')
+            with open(path, 'w') as series_file:
+                series_file.write('time,value\n0,1.0\n')
+            cache = series_cache.SeriesCache(self._cache_dir.name, 1024 * 1024)
+            key = cache.key(path, 'frame')
+
+            with open(path, 'w') as series_file:
+                series_file.write('time,value\n0,1.0\n1,2.0\n')
+            self.assertNotEqual(cache.key(path, 'frame'), key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import tempfile
+import typing
+import unittest
+
+from timeseriesloader import profiling, series_reader
+
+
+def _read_text(path: str) -> str:
+    with open(path, 'r') as text_file:
+        return text_file.read()
+
+
+class SeriesReaderTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._paths = []
+        for idx in range(20):
+            path = os.path.join(self._temp_dir.name, '{idx}.txt'.format(idx=idx))
+            with open(path, 'w') as text_file:
+                text_file.write(str(idx))
+            self._paths.append(path)
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def test_order(self) -> None:
+        for workers, backend in ((1, 'thread'), (4, 'thread'), (4, 'process'), (4, 'async')):
+            results = list(series_reader.iter_read(self._paths, _read_text, workers, backend))
+            self.assertListEqual([idx for idx, _ in results], list(range(20)))
+            self.assertListEqual([int(text) for _, text in results], list(range(20)))
+
+    def test_errors(self) -> None:
+        paths = list(self._paths)
+        paths[3] = os.path.join(self._temp_dir.name, 'missing_a.txt')
+        paths[11] = os.path.join(self._temp_dir.name, 'missing_b.txt')
+
+        for workers in (1, 4):
+            results = []
+            with self.assertRaises(series_reader.SeriesReadError) as context:
+                for result in series_reader.iter_read(paths, _read_text, workers):
+                    results.append(result)
+
+            # the remaining files are still read, and both failures are reported
+            self.assertEqual(len(results), 18)
+            self.assertListEqual([path for path, _ in context.exception.errors], [paths[3], paths[11]])
+
+    def test_duplicates(self) -> None:
+        paths = [self._paths[2], self._paths[0], self._paths[2], self._paths[1], self._paths[0], self._paths[2]]
+        read_paths = []
+
+        def read_fn(path: str) -> typing.List[str]:
+            read_paths.append(path)
+            return [_read_text(path)]
+
+        stats = series_reader.ReadStats()
+        results = list(series_reader.iter_read(paths, read_fn, stats=stats))
+
+        # each file is read once, and the result is shared by every row that references it
+        self.assertListEqual(read_paths, [self._paths[2], self._paths[0], self._paths[1]])
+        self.assertListEqual([idx for idx, _ in results], list(range(6)))
+        self.assertListEqual([result[0] for _, result in results], ['2', '0', '2', '1', '0', '2'])
+        self.assertIs(results[0][1], results[5][1])
+        self.assertDictEqual(stats.as_dict(), {'requested': 6, 'read': 3, 'saved': 3, 'reused': 0})
+
+    def test_duplicate_errors(self) -> None:
+        missing = os.path.join(self._temp_dir.name, 'missing.txt')
+        paths = [missing, self._paths[0], missing, self._paths[1]]
+
+        results = []
+        with self.assertRaises(series_reader.SeriesReadError) as context:
+            for result in series_reader.iter_read(paths, _read_text, 4):
+                results.append(result)
+
+        self.assertListEqual(results, [(1, '0'), (3, '1')])
+        self.assertEqual(len(context.exception.errors), 1)
+
+    def test_profile(self) -> None:
+        for workers, backend in ((1, 'thread'), (4, 'process'), (4, 'async')):
+            profile = profiling.ProduceProfile(slowest_count=3)
+            with profile.stage('load'):
+                results = list(series_reader.iter_read(self._paths, _read_text, workers, backend,
+                                                       profile=profile))
+            self.assertListEqual([int(text) for _, text in results], list(range(20)))
+
+            reports = []
+            profiling.add_hook(lambda name, report: reports.append((name, report)))
+            try:
+                report = profile.finish('reader')
+            finally:
+                profiling._hooks.clear()
+
+            self.assertListEqual(reports, [('reader', report)])
+            self.assertListEqual(list(report['stages']), ['load'])
+            self.assertEqual(report['files'], 20)
+            self.assertEqual(report['bytes_read'], sum(os.path.getsize(path) for path in self._paths))
+            self.assertEqual(len(report['slowest_files']), 3)
+            slowest = [entry['seconds'] for entry in report['slowest_files']]
+            self.assertListEqual(slowest, sorted(slowest, reverse=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
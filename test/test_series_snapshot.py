@@ -0,0 +1,129 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import tempfile
+import typing
+import unittest
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import series_reader, series_snapshot
+
+
+def _read_arrays(path: str) -> typing.Tuple[np.ndarray, np.ndarray]:
+    frame = pd.read_csv(path)
+    return frame.iloc[:, 0].values, frame.iloc[:, 1].values
+
+
+class SeriesSnapshotTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._store = series_snapshot.SnapshotStore(os.path.join(self._temp_dir.name, 'snapshots'))
+        self._paths = [self._write_series(idx, length=10 + idx) for idx in range(5)]
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def _write_series(self, idx: int, length: int, offset: float = 0.0) -> str:
+        path = os.path.join(self._temp_dir.name, '{idx}.csv'.format(idx=idx))
+        pd.DataFrame({'time': np.arange(length), 'value': np.arange(length) + idx + offset}).to_csv(path, index=False)
+        return path
+
+    def _read(self, paths: typing.List[str], spec: str = 'arrays') \
+            -> typing.Tuple[series_snapshot.IncrementalRead, typing.List[typing.Tuple[int, typing.Any]]]:
+        incremental = self._store.open(self._temp_dir.name, spec, paths)
+        parsed = series_reader.iter_read(incremental.changed_paths(), _read_arrays)
+        return incremental, list(incremental.merge(parsed))
+
+    def test_reuse(self) -> None:
+        incremental, first = self._read(self._paths)
+        self.assertEqual(incremental.n_unchanged(), 0)
+        self.assertTrue(incremental.save())
+
+        # unchanged files are taken from the snapshot
+        incremental, second = self._read(self._paths)
+        self.assertEqual(incremental.n_unchanged(), 5)
+        self.assertListEqual(incremental.changed_paths(), [])
+        for (first_idx, (first_times, first_values)), (second_idx, (second_times, second_values)) in \
+                zip(first, second):
+            self.assertEqual(first_idx, second_idx)
+            self.assertTrue(np.array_equal(first_times, second_times))
+            self.assertTrue(np.array_equal(first_values, second_values))
+
+        # snapshots are kept per spec
+        incremental, _ = self._read(self._paths, spec='other')
+        self.assertEqual(incremental.n_unchanged(), 0)
+
+    def test_changes(self) -> None:
+        incremental, _ = self._read(self._paths)
+        incremental.save()
+
+        # a changed file and a new file are parsed, and merged in order with the unchanged files
+        self._write_series(2, length=20, offset=100)
+        paths = self._paths + [self._write_series(5, length=3)]
+        incremental, series = self._read(paths)
+        self.assertListEqual(incremental.changed_paths(), [paths[2], paths[5]])
+        self.assertListEqual([idx for idx, _ in series], list(range(6)))
+        for idx, (times, values) in series:
+            expected_times, expected_values = _read_arrays(paths[idx])
+            self.assertTrue(np.array_equal(times, expected_times))
+            self.assertTrue(np.array_equal(values, expected_values))
+
+    def test_resume(self) -> None:
+        incremental, _ = self._read(self._paths)
+        incremental.save()
+
+        # a read continued from a later position, with a repeated file
+        self._write_series(3, length=4)
+        paths = self._paths + self._paths[:1]
+        incremental = self._store.open(self._temp_dir.name, 'arrays', paths)
+        self.assertListEqual(incremental.changed_paths(2), [paths[3]])
+        first = list(incremental.merge(series_reader.iter_read(incremental.changed_paths(), _read_arrays)))
+        self.assertEqual(len(first), 6)
+        self.assertTrue(incremental.save())
+
+        # a snapshot is only saved once every position has been read
+        incremental = self._store.open(self._temp_dir.name, 'arrays', self._paths)
+        self.assertEqual(incremental.n_unchanged(), 5)
+        self.assertEqual(len(list(incremental.merge(iter([]), start=3))), 2)
+        self.assertFalse(incremental.save())
+
+    def test_frames(self) -> None:
+        frames = [pd.DataFrame({'time': np.arange(3), 'label': ['a', 'b', 'c'], 'value': [1.0, 2.0, 3.0]}),
+                  pd.DataFrame({'time': np.arange(2), 'label': ['d', 'e'], 'value': [4.0, np.nan]})]
+        snapshot = series_snapshot.SeriesSnapshot.build(self._paths[:2], [(1, 2), (3, 4)], frames)
+        key = self._store.key(self._temp_dir.name, 'frame')
+        self.assertTrue(self._store.save(key, snapshot))
+
+        snapshot = self._store.load(key)
+        self.assertEqual(snapshot.lookup(self._paths[1], (3, 4)), 1)
+        self.assertIsNone(snapshot.lookup(self._paths[1], (3, 5)))
+        for slot, frame in enumerate(frames):
+            pd.testing.assert_frame_equal(snapshot.series(slot), frame)
+
+        # frames with differing columns, or missing strings, are not saved
+        self.assertIsNone(series_snapshot.SeriesSnapshot.build(self._paths[:2], [(1, 2), (3, 4)],
+                                                               [frames[0], frames[1].iloc[:, :2]]))
+        frames[1].loc[0, 'label'] = None
+        snapshot = series_snapshot.SeriesSnapshot.build(self._paths[:2], [(1, 2), (3, 4)], frames)
+        self.assertFalse(self._store.save(key, snapshot))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import tarfile
+import tempfile
+import typing
+import unittest
+import zipfile
+
+import pandas as pd  # type: ignore
+
+from timeseriesloader import series_cache, series_reader, series_source
+
+
+def _read_frame(uri: str) -> pd.DataFrame:
+    with series_source.open_series(uri) as source:
+        return pd.read_csv(source)
+
+
+class SeriesSourceTestCase(unittest.TestCase):
+
+    _timeseries_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'dataset', 'timeseries'))
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._names = sorted(os.listdir(self._timeseries_path))
+        self._expected = [pd.read_csv(os.path.join(self._timeseries_path, name)) for name in self._names]
+
+    def tearDown(self) -> None:
+        self._temp_dir.cleanup()
+
+    def _uris(self, directory: str) -> typing.List[str]:
+        return ['file://' + os.path.join(self._temp_dir.name, directory, name) for name in self._names]
+
+    def _assert_read(self, uris: typing.List[str]) -> None:
+        for workers, backend in ((1, 'thread'), (4, 'thread'), (4, 'process')):
+            # duplicated files are read once and shared
+            results = list(series_reader.iter_read(uris + uris[:2], _read_frame, workers, backend))
+            self.assertListEqual([idx for idx, _ in results], list(range(len(uris) + 2)))
+            for (_, frame), expected in zip(results, self._expected + self._expected[:2]):
+                pd.testing.assert_frame_equal(frame, expected)
+
+    def test_plain(self) -> None:
+        location = series_source.locate(os.path.join(self._timeseries_path, self._names[0]))
+        self.assertTrue(location.plain)
+        self.assertIsNone(series_source.local_path('http://example.com/series.csv'))
+        self.assertEqual(series_source.local_path('file:///data/my%20series.csv'), '/data/my series.csv')
+
+    def test_compressed(self) -> None:
+        for suffix, open_fn in (('.gz', gzip.open), ('.bz2', bz2.open), ('.xz', lzma.open)):
+            directory = os.path.join(self._temp_dir.name, suffix[1:])
+            os.makedirs(directory)
+            for name in self._names:
+                with open(os.path.join(self._timeseries_path, name), 'rb') as source:
+                    with open_fn(os.path.join(directory, name + suffix), 'wb') as target:
+                        shutil.copyfileobj(source, target)
+
+            location = series_source.locate(self._uris(suffix[1:])[0])
+            self.assertTrue(location.path.endswith(suffix))
+            self.assertFalse(location.plain)
+            self._assert_read(self._uris(suffix[1:]))
+
+    def test_zip(self) -> None:
+        # members named relative to the archive, or prefixed with the directory it stands in for
+        for directory, prefix in (('flat', ''), ('nested', 'nested/')):
+            with zipfile.ZipFile(os.path.join(self._temp_dir.name, directory + '.zip'), 'w') as archive:
+                for name in self._names:
+                    archive.write(os.path.join(self._timeseries_path, name), prefix + name)
+
+            location = series_source.locate(self._uris(directory)[0])
+            self.assertEqual(location.member, prefix + self._names[0])
+            self._assert_read(self._uris(directory))
+
+    def test_zip_forked(self) -> None:
+        # process pool workers must not reuse archive handles opened in the parent, whose file offset they share
+        with zipfile.ZipFile(os.path.join(self._temp_dir.name, 'forked.zip'), 'w') as archive:
+            for idx in range(40):
+                archive.write(os.path.join(self._timeseries_path, self._names[idx % len(self._names)]),
+                              '{idx:04d}.csv'.format(idx=idx))
+        uris = ['file://' + os.path.join(self._temp_dir.name, 'forked', '{idx:04d}.csv'.format(idx=idx))
+                for idx in range(40)]
+
+        for _ in range(5):
+            serial = [frame for _, frame in series_reader.iter_read(uris, _read_frame, 1)]
+            forked = [frame for _, frame in series_reader.iter_read(uris, _read_frame, 4, 'process')]
+            for frame, expected in zip(forked, serial):
+                pd.testing.assert_frame_equal(frame, expected)
+
+    def test_tar(self) -> None:
+        # compressed members of a compressed archive
+        staging = os.path.join(self._temp_dir.name, 'staging')
+        os.makedirs(staging)
+        with tarfile.open(os.path.join(self._temp_dir.name, 'series.tar.gz'), 'w:gz') as archive:
+            for name in self._names:
+                member_path = os.path.join(staging, name + '.gz')
+                with open(os.path.join(self._timeseries_path, name), 'rb') as source:
+                    with gzip.open(member_path, 'wb') as target:
+                        shutil.copyfileobj(source, target)
+                archive.add(member_path, name + '.gz')
+
+        self.assertEqual(series_source.locate(self._uris('series')[0]).member, self._names[0] + '.gz')
+        self._assert_read(self._uris('series'))
+
+    def test_missing(self) -> None:
+        with zipfile.ZipFile(os.path.join(self._temp_dir.name, 'series.zip'), 'w') as archive:
+            archive.write(os.path.join(self._timeseries_path, self._names[0]), self._names[0])
+
+        uris = self._uris('series')
+        self.assertIsNone(series_source.locate(uris[1]).member)
+        with self.assertRaises(series_reader.SeriesReadError):
+            list(series_reader.iter_read(uris, _read_frame))
+
+    def test_cache_keys(self) -> None:
+        with zipfile.ZipFile(os.path.join(self._temp_dir.name, 'series.zip'), 'w') as archive:
+            for name in self._names:
+                archive.write(os.path.join(self._timeseries_path, name), name)
+
+        cache = series_cache.SeriesCache(os.path.join(self._temp_dir.name, 'cache'), 1024 * 1024)
+        keys = [cache.key(uri, 'frame') for uri in self._uris('series')]
+        self.assertNotIn(None, keys)
+        self.assertEqual(len(set(keys)), len(keys))
+
+        list(series_reader.iter_read(self._uris('series'), _read_frame, cache=cache, cache_spec='frame'))
+        results = list(series_reader.iter_read(self._uris('series'), _read_frame, cache=cache, cache_spec='frame'))
+        self.assertEqual(cache.stats()['hits'], len(self._names))
+        for (_, frame), expected in zip(results, self._expected):
+            pd.testing.assert_frame_equal(frame, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
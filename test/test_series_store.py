@@ -0,0 +1,93 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import series_store
+
+
+class SeriesStoreTestCase(unittest.TestCase):
+
+    _timeseries_path = os.path.abspath(os.path.join(os.path.dirname(__file__), 'dataset', 'timeseries'))
+
+    def setUp(self) -> None:
+        self._store_dir = tempfile.TemporaryDirectory()
+        series_store.pack_directory(self._timeseries_path, output_dir=self._store_dir.name)
+        self._store = series_store.SeriesStore(self._store_dir.name, self._timeseries_path)
+
+    def tearDown(self) -> None:
+        self._store_dir.cleanup()
+
+    def test_series(self) -> None:
+        self.assertEqual(len(self._store), 4)
+        self.assertTrue(self._store.covers(['0000_train_ts.csv', '0003_train_ts.csv'], 0, 1))
+        self.assertFalse(self._store.covers(['0000_train_ts.csv'], 0, 2))
+        self.assertFalse(self._store.covers(['missing.csv'], 0, 1))
+
+        series = pd.read_csv(os.path.join(self._timeseries_path, '0002_train_ts.csv'))
+        times, values = self._store.series(self._store.positions['0002_train_ts.csv'])
+        np.testing.assert_array_equal(times, series.iloc[:, 0].values)
+        np.testing.assert_array_equal(values, series.iloc[:, 1].values)
+
+    def test_matrix(self) -> None:
+        expected = np.stack([pd.read_csv(os.path.join(self._timeseries_path, name)).iloc[:, 1].values
+                             for name in sorted(self._store.positions)])
+
+        # a contiguous run of series is a view of the mapped file
+        matrix = self._store.matrix([1, 2, 3])
+        np.testing.assert_array_equal(matrix, expected[1:4])
+        self.assertIsInstance(matrix.base, np.memmap)
+
+        np.testing.assert_array_equal(self._store.matrix([3, 0, 0]), expected[[3, 0, 0]])
+
+    def test_changed(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            series_dir = os.path.join(temp_dir, 'timeseries')
+            shutil.copytree(self._timeseries_path, series_dir)
+            series_store.pack_directory(series_dir)
+            store = series_store.SeriesStore.open('file://' + series_dir)
+            names = ['0000_train_ts.csv', '0001_train_ts.csv']
+            self.assertTrue(store.covers(names, 0, 1))
+            self.assertTrue(store.covers(names, 0, 1, check_files=True))
+
+            # a file rewritten in place is only seen when each file is checked
+            series_path = os.path.join(series_dir, '0001_train_ts.csv')
+            with open(series_path, 'a') as series_file:
+                series_file.write('1000,1.0\n')
+            self.assertTrue(store.covers(names, 0, 1))
+            self.assertFalse(store.covers(names, 0, 1, check_files=True))
+            self.assertTrue(store.covers(names[:1], 0, 1, check_files=True))
+
+            # while any file added to or removed from the directory makes the whole store stale
+            series_store.pack_directory(series_dir)
+            store = series_store.SeriesStore.open('file://' + series_dir)
+            self.assertTrue(store.covers(names, 0, 1))
+            shutil.copyfile(series_path, os.path.join(series_dir, 'added.csv'))
+            self.assertFalse(store.covers(names[:1], 0, 1))
+
+    def test_missing(self) -> None:
+        with tempfile.TemporaryDirectory() as empty_dir:
+            self.assertIsNone(series_store.SeriesStore.open('file://' + empty_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
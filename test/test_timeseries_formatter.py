@@ -17,6 +17,9 @@
 import unittest
 from os import path
 import csv
+import tempfile
+
+import pandas as pd  # type: ignore
 
 from d3m import container
 from d3m.primitives.data_preprocessing.timeseries_formatter import DistilTimeSeriesFormatter as TimeSeriesFormatter
@@ -46,6 +49,140 @@ class TimeSeriesFormatterPrimitiveTestCase(unittest.TestCase):
         self.assertEqual(timeseries_dataset['0'].shape[0], 664)
         self.assertEqual(timeseries_dataset['0'].shape[1], 6)
 
+        # verify that the main resource row is broadcast across the timesteps of its series
+        timeseries_dataframe = timeseries_dataset['0']
+        self.assertListEqual(list(timeseries_dataframe.columns),
+                             ['d3mIndex', 'timeseries_file', 'label', 'series_id', 'time', 'value'])
+        row = timeseries_dataframe.iloc[200]
+        self.assertEqual(row['timeseries_file'], '0001_train_ts.csv')
+        self.assertEqual(int(row['series_id']), 1)
+        self.assertEqual(int(row['time']), 34)
+
+    def test_metadata(self) -> None:
+        dataset = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesFormatter.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 1})
+        timeseries_dataset = TimeSeriesFormatter(hyperparams=hyperparams).produce(inputs=dataset).value
+
+        # main resource columns carry their metadata over, the remaining columns are typed
+        metadata = timeseries_dataset.metadata
+        self.assertEqual(metadata.query(('0',))['dimension']['length'], 664)
+        self.assertEqual(metadata.query(('0', metadata_base.ALL_ELEMENTS))['dimension']['length'], 6)
+        label_metadata = metadata.query(('0', metadata_base.ALL_ELEMENTS, 2))
+        self.assertEqual(label_metadata['name'], 'label')
+        self.assertIn('https://metadata.datadrivendiscovery.org/types/SuggestedTarget',
+                      label_metadata['semantic_types'])
+        self.assertNotIn('foreign_key', metadata.query(('0', metadata_base.ALL_ELEMENTS, 1)))
+        self.assertEqual(metadata.query(('0', metadata_base.ALL_ELEMENTS, 3))['name'], 'series_id')
+        self.assertEqual(metadata.query(('0', metadata_base.ALL_ELEMENTS, 5))['structural_type'],
+                         timeseries_dataset['0'].dtypes.iloc[5].type)
+
+    def test_chunks(self) -> None:
+        dataset = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesFormatter.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 1, 'chunk_size': 3})
+        ts_formatter = TimeSeriesFormatter(hyperparams=hyperparams)
+        expected = ts_formatter.produce(inputs=dataset).value['0']
+
+        # series are split across chunks, which together match the produce output
+        chunks = list(ts_formatter.iter_chunks(inputs=dataset))
+        self.assertListEqual([chunk.shape[0] for chunk in chunks], [498, 166])
+        self.assertListEqual(list(chunks[1].index), list(range(498, 664)))
+        combined = pd.concat(chunks)
+        self.assertListEqual(list(combined.columns), list(expected.columns))
+        self.assertTrue((combined.values == expected.values).all())
+
+    def test_profile(self) -> None:
+        dataset = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesFormatter.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 1, 'chunk_size': 3, 'profile': True})
+        ts_formatter = TimeSeriesFormatter(hyperparams=hyperparams)
+        ts_formatter.produce(inputs=dataset)
+        profile = ts_formatter.get_profile()
+        self.assertListEqual(list(profile['stages']), ['discovery', 'load', 'long_form', 'metadata'])
+        self.assertEqual(profile['files'], 4)
+
+        # chunk stages are summed once every chunk has been generated
+        list(ts_formatter.iter_chunks(inputs=dataset))
+        self.assertEqual(ts_formatter.get_profile()['files'], 4)
+
+    def test_deadline(self) -> None:
+        dataset = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesFormatter.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 1})
+        ts_formatter = TimeSeriesFormatter(hyperparams=hyperparams)
+        expected = ts_formatter.produce(inputs=dataset).value['0']
+
+        # each call reads the next increment and returns every row read so far
+        result = ts_formatter.produce(inputs=dataset, iterations=2)
+        self.assertFalse(result.has_finished)
+        self.assertEqual(result.value['0'].shape[0], 332)
+        self.assertEqual(ts_formatter.get_cursor(), 2)
+
+        result = ts_formatter.produce(inputs=dataset, iterations=2)
+        self.assertTrue(result.has_finished)
+        self.assertIsNone(ts_formatter.get_cursor())
+        self.assertTrue((expected.values == result.value['0'].values).all())
+
+    def test_broadcast_layout(self) -> None:
+        dataset = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesFormatter.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 1})
+        expected = TimeSeriesFormatter(hyperparams=hyperparams).produce(inputs=dataset).value['0']
+
+        hyperparams = hyperparams.replace({'broadcast_layout': 'categorical'})
+        timeseries_dataset = TimeSeriesFormatter(hyperparams=hyperparams).produce(inputs=dataset).value
+        self.assertEqual(timeseries_dataset['0']['label'].dtype.name, 'category')
+        self.assertTrue((timeseries_dataset['0'].astype(object).values == expected.values).all())
+
+        # the narrow long form refers to a resource holding one row per series
+        hyperparams = hyperparams.replace({'broadcast_layout': 'side_resource'})
+        timeseries_dataset = TimeSeriesFormatter(hyperparams=hyperparams).produce(inputs=dataset).value
+        self.assertListEqual(list(timeseries_dataset['0'].columns), list(expected.columns[3:]))
+        self.assertEqual(timeseries_dataset['1'].shape, (4, 4))
+        metadata = timeseries_dataset.metadata
+        self.assertDictEqual(dict(metadata.query(('0', metadata_base.ALL_ELEMENTS, 0))['foreign_key']),
+                             {'type': 'COLUMN', 'resource_id': '1', 'column_index': 3})
+        self.assertEqual(metadata.query(('1', metadata_base.ALL_ELEMENTS, 2))['name'], 'label')
+
+    def test_window(self) -> None:
+        dataset = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesFormatter.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 1, 'time_end': 100, 'stride': 10})
+        timeseries_dataframe = TimeSeriesFormatter(hyperparams=hyperparams).produce(inputs=dataset).value['0']
+
+        # every tenth row of the first 100 of each series
+        self.assertEqual(timeseries_dataframe.shape[0], 40)
+        self.assertListEqual(list(timeseries_dataframe['time'][:10]), list(range(0, 100, 10)))
+
+    def test_resume(self) -> None:
+        dataset = self._load_timeseries()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            hyperparams_class = \
+                TimeSeriesFormatter.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+            hyperparams = hyperparams_class.defaults().replace({'file_col_index': 1, 'incremental_dir': temp_dir})
+            expected = TimeSeriesFormatter(hyperparams=hyperparams).produce(inputs=dataset).value['0']
+
+            # a later call reuses every unchanged series without parsing
+            ts_formatter = TimeSeriesFormatter(hyperparams=hyperparams)
+            timeseries_dataframe = ts_formatter.produce(inputs=dataset).value['0']
+            self.assertEqual(ts_formatter.get_read_stats()['reused'], 4)
+            self.assertEqual(ts_formatter.get_read_stats()['read'], 0)
+            self.assertTrue((expected.values == timeseries_dataframe.values).all())
+
     @classmethod
     def _load_timeseries(cls) -> container.Dataset:
         dataset_doc_path = path.join(cls._dataset_path, 'datasetDoc.json')
@@ -17,11 +17,18 @@
 import unittest
 from os import path
 import csv
+import shutil
+import tempfile
 
-from d3m import container
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from d3m import container, exceptions
 from d3m.primitives.data_preprocessing.timeseries_loader import DistilTimeSeriesLoader as TimeSeriesLoader
 from d3m.metadata import base as metadata_base
 
+from timeseriesloader import series_store
+
 
 class TimeSeriesLoaderPrimitiveTestCase(unittest.TestCase):
 
@@ -66,6 +73,290 @@ class TimeSeriesLoaderPrimitiveTestCase(unittest.TestCase):
         ts_values = list(timeseries_dataframe.iloc[0])
         self.assertEqual(len(ts_values), len(values))
 
+    def test_dtype(self) -> None:
+        dataframe = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesLoader.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 0, 'dtype': 'float32'})
+        ts_loader = TimeSeriesLoader(hyperparams=hyperparams)
+        timeseries_dataframe = ts_loader.produce(inputs=dataframe).value
+
+        # verify that the values are stored using the requested type
+        self.assertEqual(timeseries_dataframe.shape, (4, 166))
+        self.assertTrue(all(str(dtype) == 'float32' for dtype in timeseries_dataframe.dtypes))
+        self.assertAlmostEqual(float(timeseries_dataframe.iloc[0, 0]), 1.9823, places=4)
+
+        # the metadata describes every column with the value type
+        metadata = timeseries_dataframe.metadata
+        self.assertEqual(metadata.query(())['dimension']['length'], 4)
+        self.assertEqual(metadata.query((metadata_base.ALL_ELEMENTS,))['dimension']['length'], 166)
+        self.assertEqual(metadata.query((metadata_base.ALL_ELEMENTS, 100))['structural_type'], np.float32)
+
+    def test_parse_times_first(self) -> None:
+        dataframe = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesLoader.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 0})
+        expected = TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe).value
+
+        # only the first file's times are parsed, and the result is unchanged
+        hyperparams = hyperparams.replace({'parse_times': 'first'})
+        timeseries_dataframe = TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe).value
+        self.assertListEqual(list(expected.columns), list(timeseries_dataframe.columns))
+        self.assertTrue((expected.values == timeseries_dataframe.values).all())
+
+        # a file with different timestamps is caught by its fingerprint
+        with tempfile.TemporaryDirectory() as temp_dir:
+            series_dir = path.join(temp_dir, 'timeseries')
+            shutil.copytree(path.join(self._dataset_path, 'timeseries'), series_dir)
+            shifted_path = path.join(series_dir, '0002_train_ts.csv')
+            with open(shifted_path, 'r') as csvfile:
+                lines = csvfile.readlines()
+            with open(shifted_path, 'w') as csvfile:
+                csvfile.writelines([lines[0]] + lines[2:] + ['166,0.0\n'])
+            dataframe.metadata = dataframe.metadata.update((metadata_base.ALL_ELEMENTS, 0),
+                                                           {'location_base_uris': ('file://' + series_dir,)})
+
+            with self.assertRaises(exceptions.InvalidArgumentValueError):
+                TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe)
+
+    def test_series_store(self) -> None:
+        dataframe = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesLoader.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 0})
+        expected = TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe).value
+
+        # pack a copy of the series files, and point the file column at it
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store_dir = path.join(temp_dir, 'timeseries')
+            shutil.copytree(path.join(self._dataset_path, 'timeseries'), store_dir)
+            series_store.pack_directory(store_dir)
+            dataframe.metadata = dataframe.metadata.update((metadata_base.ALL_ELEMENTS, 0),
+                                                           {'location_base_uris': ('file://' + store_dir,)})
+
+            timeseries_dataframe = TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe).value
+            self.assertListEqual(list(expected.columns), list(timeseries_dataframe.columns))
+            self.assertTrue((expected.values == timeseries_dataframe.values).all())
+
+            # series are taken from the store one iteration at a time, and the load resumes where it stopped
+            ts_loader = TimeSeriesLoader(hyperparams=hyperparams)
+            result = ts_loader.produce(inputs=dataframe, iterations=1)
+            self.assertFalse(result.has_finished)
+            self.assertEqual(result.iterations_done, 1)
+            self.assertEqual(result.value.shape[0], 1)
+            result = ts_loader.produce(inputs=dataframe)
+            self.assertTrue(result.has_finished)
+            self.assertEqual(result.iterations_done, 3)
+            self.assertTrue((expected.values == result.value.values).all())
+
+            # the output is a copy of the store, so it can be written to
+            timeseries_dataframe.iloc[0, 0] = 5.0
+            self.assertEqual(timeseries_dataframe.iloc[0, 0], 5.0)
+
+            # a file rewritten in place after packing is parsed rather than taken from the store when each file
+            # is checked
+            series_path = path.join(store_dir, '0001_train_ts.csv')
+            changed = pd.read_csv(series_path)
+            changed.iloc[:, 1] += 1.0
+            changed.to_csv(series_path, index=False)
+            files_hyperparams = hyperparams.replace({'store_check': 'files'})
+            timeseries_dataframe = TimeSeriesLoader(hyperparams=files_hyperparams).produce(inputs=dataframe).value
+            np.testing.assert_allclose(timeseries_dataframe.values[1], changed.iloc[:, 1].values)
+
+            # while a file replaced in the series directory is caught by the directory check alone
+            changed.iloc[:, 1] += 1.0
+            changed.to_csv(series_path + '.tmp', index=False)
+            shutil.move(series_path + '.tmp', series_path)
+            timeseries_dataframe = TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe).value
+            np.testing.assert_allclose(timeseries_dataframe.values[1], changed.iloc[:, 1].values)
+
+    def test_union_alignment(self) -> None:
+        dataframe = self._load_timeseries()
+
+        # drop the even timestamps from the second series
+        with tempfile.TemporaryDirectory() as temp_dir:
+            series_dir = path.join(temp_dir, 'timeseries')
+            shutil.copytree(path.join(self._dataset_path, 'timeseries'), series_dir)
+            irregular_path = path.join(series_dir, '0001_train_ts.csv')
+            with open(irregular_path, 'r') as csvfile:
+                lines = csvfile.readlines()
+            with open(irregular_path, 'w') as csvfile:
+                csvfile.writelines([lines[0]] + lines[2::2])
+            dataframe.metadata = dataframe.metadata.update((metadata_base.ALL_ELEMENTS, 0),
+                                                           {'location_base_uris': ('file://' + series_dir,)})
+
+            hyperparams_class = \
+                TimeSeriesLoader.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+            hyperparams = hyperparams_class.defaults().replace({'file_col_index': 0, 'alignment': 'union'})
+            ts_loader = TimeSeriesLoader(hyperparams=hyperparams)
+            timeseries_dataframe = ts_loader.produce(inputs=dataframe).value
+
+            # the missing timestamps are NaN, and the rest stay aligned
+            self.assertEqual(timeseries_dataframe.shape, (4, 166))
+            self.assertEqual(int(timeseries_dataframe.iloc[1].isnull().sum()), 83)
+            self.assertEqual(int(timeseries_dataframe.iloc[0].isnull().sum()), 0)
+
+            ragged_series = ts_loader.load_ragged(inputs=dataframe)
+            self.assertListEqual(list(ragged_series.lengths), [166, 83, 166, 166])
+
+    def test_profile(self) -> None:
+        dataframe = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesLoader.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 0})
+        ts_loader = TimeSeriesLoader(hyperparams=hyperparams)
+        ts_loader.produce(inputs=dataframe)
+        self.assertDictEqual(ts_loader.get_profile(), {})
+
+        ts_loader = TimeSeriesLoader(hyperparams=hyperparams.replace({'profile': True}))
+        ts_loader.produce(inputs=dataframe)
+        profile = ts_loader.get_profile()
+
+        # every stage is timed, and each distinct series file is recorded once
+        self.assertListEqual(list(profile['stages']), ['discovery', 'load', 'dataframe', 'metadata'])
+        self.assertEqual(profile['files'], 4)
+        self.assertGreater(profile['bytes_read'], 0)
+        self.assertEqual(len(profile['slowest_files']), 4)
+
+    def test_deadline(self) -> None:
+        dataframe = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesLoader.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        for parse_times in ('all', 'first'):
+            hyperparams = hyperparams_class.defaults().replace({'file_col_index': 0, 'parse_times': parse_times})
+            ts_loader = TimeSeriesLoader(hyperparams=hyperparams)
+            expected = ts_loader.produce(inputs=dataframe).value
+            self.assertIsNone(ts_loader.get_cursor())
+
+            # each call loads the next increment and returns every row loaded so far
+            result = ts_loader.produce(inputs=dataframe, iterations=3)
+            self.assertFalse(result.has_finished)
+            self.assertEqual(result.iterations_done, 3)
+            self.assertEqual(result.value.shape, (3, 166))
+            self.assertEqual(ts_loader.get_cursor(), 3)
+
+            result = ts_loader.produce(inputs=dataframe, iterations=3)
+            self.assertTrue(result.has_finished)
+            self.assertEqual(result.iterations_done, 1)
+            self.assertIsNone(ts_loader.get_cursor())
+            self.assertTrue((expected.values == result.value.values).all())
+
+        # an expired timeout still loads one series per call
+        result = ts_loader.produce(inputs=dataframe, timeout=0)
+        self.assertFalse(result.has_finished)
+        self.assertEqual(result.value.shape[0], 1)
+
+    def test_channels(self) -> None:
+        dataframe = self._load_timeseries()
+
+        # add a second value column to each series file, holding the negated values
+        with tempfile.TemporaryDirectory() as temp_dir:
+            series_dir = path.join(temp_dir, 'timeseries')
+            shutil.copytree(path.join(self._dataset_path, 'timeseries'), series_dir)
+            for file_name in dataframe.iloc[:, 0]:
+                series_path = path.join(series_dir, file_name)
+                with open(series_path, 'r') as csvfile:
+                    rows = list(csv.reader(csvfile))
+                with open(series_path, 'w') as csvfile:
+                    writer = csv.writer(csvfile)
+                    writer.writerow(rows[0] + ['negated'])
+                    writer.writerows(row + [str(-float(row[1]))] for row in rows[1:])
+            dataframe.metadata = dataframe.metadata.update((metadata_base.ALL_ELEMENTS, 0),
+                                                           {'location_base_uris': ('file://' + series_dir,)})
+
+            hyperparams_class = \
+                TimeSeriesLoader.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+            hyperparams = hyperparams_class.defaults().replace({'file_col_index': 0})
+            expected = TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe).value
+
+            hyperparams = hyperparams.replace({'value_col_indices': (2, 1)})
+            ts_loader = TimeSeriesLoader(hyperparams=hyperparams)
+            timestamps, tensor = ts_loader.load_tensor(inputs=dataframe)
+            self.assertEqual(tensor.shape, (4, 166, 2))
+            self.assertListEqual(list(timestamps), list(expected.columns))
+            self.assertTrue((tensor[:, :, 0] == -expected.values).all())
+            self.assertTrue((tensor[:, :, 1] == expected.values).all())
+
+            # each file is read once for all of its channels
+            self.assertEqual(ts_loader.get_read_stats()['read'], 4)
+
+            channels = ts_loader.load_channels(inputs=dataframe)
+            self.assertEqual(len(channels), 2)
+            self.assertTrue(channels[0].columns.equals(channels[1].columns))
+            self.assertTrue((channels[1].values == expected.values).all())
+
+            # irregular series are aligned on the union of their timestamps, as in produce
+            irregular_path = path.join(series_dir, dataframe.iloc[1, 0])
+            with open(irregular_path, 'r') as csvfile:
+                lines = csvfile.readlines()
+            with open(irregular_path, 'w') as csvfile:
+                csvfile.writelines([lines[0]] + lines[2::2])
+            hyperparams = hyperparams.replace({'alignment': 'union'})
+            expected = TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe).value
+            timestamps, tensor = TimeSeriesLoader(hyperparams=hyperparams).load_tensor(inputs=dataframe)
+            self.assertListEqual(list(timestamps), list(expected.columns))
+            np.testing.assert_array_equal(tensor[:, :, 0], -expected.values)
+            np.testing.assert_array_equal(tensor[:, :, 1], expected.values)
+
+    def test_window(self) -> None:
+        dataframe = self._load_timeseries()
+
+        hyperparams_class = \
+            TimeSeriesLoader.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+        hyperparams = hyperparams_class.defaults().replace({'file_col_index': 0})
+        expected = TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe).value
+
+        # keep times 20 to 79, averaging each group of 4 rows
+        hyperparams = hyperparams.replace({'time_start': 20, 'time_end': 80, 'stride': 4, 'aggregation': 'mean'})
+        timeseries_dataframe = TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe).value
+        self.assertEqual(timeseries_dataframe.shape, (4, 15))
+        self.assertListEqual(list(timeseries_dataframe.columns), list(range(20, 80, 4)))
+        window = expected.loc[:, 20:79].values
+        self.assertTrue(np.allclose(timeseries_dataframe.values, window.reshape(4, 15, 4).mean(axis=2)))
+
+    def test_resume(self) -> None:
+        dataframe = self._load_timeseries()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            series_dir = path.join(temp_dir, 'timeseries')
+            shutil.copytree(path.join(self._dataset_path, 'timeseries'), series_dir)
+            dataframe.metadata = dataframe.metadata.update((metadata_base.ALL_ELEMENTS, 0),
+                                                           {'location_base_uris': ('file://' + series_dir,)})
+
+            hyperparams_class = \
+                TimeSeriesLoader.metadata.query()['primitive_code']['class_type_arguments']['Hyperparams']
+            hyperparams = hyperparams_class.defaults().replace(
+                {'file_col_index': 0, 'incremental_dir': path.join(temp_dir, 'snapshots')})
+            expected = TimeSeriesLoader(hyperparams=hyperparams).produce(inputs=dataframe).value
+
+            # a later call reuses every unchanged series without parsing
+            ts_loader = TimeSeriesLoader(hyperparams=hyperparams)
+            timeseries_dataframe = ts_loader.produce(inputs=dataframe).value
+            self.assertEqual(ts_loader.get_read_stats()['reused'], 4)
+            self.assertEqual(ts_loader.get_read_stats()['read'], 0)
+            self.assertTrue((expected.values == timeseries_dataframe.values).all())
+
+            # only a changed file is parsed again
+            series_path = path.join(series_dir, dataframe.iloc[1, 0])
+            with open(series_path, 'r') as csvfile:
+                rows = list(csv.reader(csvfile))
+            with open(series_path, 'w') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(rows[0])
+                writer.writerows([row[0], str(float(row[1]) + 1)] for row in rows[1:])
+
+            timeseries_dataframe = ts_loader.produce(inputs=dataframe).value
+            self.assertEqual(ts_loader.get_read_stats()['reused'], 3)
+            self.assertEqual(ts_loader.get_read_stats()['read'], 1)
+            self.assertTrue(np.allclose(timeseries_dataframe.values[1], expected.values[1] + 1))
+            self.assertTrue((expected.values[[0, 2, 3]] == timeseries_dataframe.values[[0, 2, 3]]).all())
+
     @classmethod
     def _load_timeseries(cls) -> container.DataFrame:
         dataset_doc_path = path.join(cls._dataset_path, 'datasetDoc.json')
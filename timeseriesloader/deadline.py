@@ -0,0 +1,56 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+import time
+
+__all__ = ('Deadline',)
+
+T = typing.TypeVar('T')
+
+
+class Deadline:
+    """
+    Tracks the `timeout` and `iterations` budget of a produce call, where one iteration is one series.
+    Either limit may be None, and a deadline with neither limit is never reached.
+    """
+
+    def __init__(self, timeout: typing.Optional[float] = None, iterations: typing.Optional[int] = None) -> None:
+        self._end = None if timeout is None else time.monotonic() + timeout
+        self._iterations = iterations
+        self.iterations_done = 0
+
+    def reached(self) -> bool:
+        if self._iterations is not None and self.iterations_done >= self._iterations:
+            return True
+        return self._end is not None and time.monotonic() >= self._end
+
+    def take(self, items: typing.Iterator[T]) -> typing.Iterator[T]:
+        """
+        Yields items until the deadline is reached, counting an iteration once the consumer has processed
+        each one.  At least one item is always yielded so that every call makes progress.  The source is
+        closed when iteration stops early, so that reads queued on a worker pool are cancelled.
+        """
+        try:
+            for item in items:
+                yield item
+                self.iterations_done += 1
+                if self.reached():
+                    break
+        finally:
+            close = getattr(items, 'close', None)
+            if close is not None:
+                close()
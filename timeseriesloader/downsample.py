@@ -0,0 +1,151 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+__all__ = ('AGGREGATIONS', 'SeriesWindow', 'NO_WINDOW')
+
+# first keeps the first row of each group of stride rows, the others reduce each numeric value column
+AGGREGATIONS = ('first', 'mean', 'min', 'max', 'last')
+
+_CHUNK_ROWS = 65536
+
+
+class SeriesWindow:
+    """
+    A time range and downsampling applied to each series while its file is parsed.  Rows with times before
+    `time_start` or at or after `time_end` are dropped, and each group of `stride` consecutive remaining rows
+    is reduced to one row with `aggregation`.  Reduced rows keep the time of the first row of their group, as
+    do non-numeric columns.  Series files are expected in time order, so parsing stops at the first row past
+    `time_end`.  Files are parsed in chunks, so only the rows that are kept are held in memory.
+    """
+
+    def __init__(self,
+                 time_start: typing.Optional[float] = None,
+                 time_end: typing.Optional[float] = None,
+                 stride: int = 1,
+                 aggregation: str = 'first') -> None:
+        if aggregation not in AGGREGATIONS:
+            raise ValueError('unsupported aggregation ' + str(aggregation))
+        if stride < 1:
+            raise ValueError('stride must be at least 1')
+        self.time_start = time_start
+        self.time_end = time_end
+        self.stride = stride
+        self.aggregation = aggregation
+
+    @property
+    def active(self) -> bool:
+        return self.time_start is not None or self.time_end is not None or self.stride > 1
+
+    def spec(self) -> str:
+        # suffix identifying the window in cache specs, empty when every row is kept
+        if not self.active:
+            return ''
+        return ',start={start},end={end},stride={stride},aggregation={aggregation}'.format(
+            start=self.time_start, end=self.time_end, stride=self.stride, aggregation=self.aggregation)
+
+    def read_csv(self, source: typing.Union[str, typing.IO], time_column: int, **kwargs: typing.Any) -> pd.DataFrame:
+        """
+        Parses a series file path or stream with pandas.read_csv, passing on `kwargs`, and applies the window.
+        `time_column` is the position of the time column among the parsed columns.
+        """
+        if not self.active:
+            return pd.read_csv(source, **kwargs)
+
+        parts = []
+        remainder = None
+        for chunk in pd.read_csv(source, chunksize=_CHUNK_ROWS, **kwargs):
+            # times are in order, so a chunk only needs filtering when its first or last row is out of range
+            past_end = False
+            if self.time_end is not None and len(chunk) > 0 and not chunk.iloc[-1, time_column] < self.time_end:
+                past_end = True
+                chunk = chunk[(chunk.iloc[:, time_column] < self.time_end).values]
+            if self.time_start is not None and len(chunk) > 0 and chunk.iloc[0, time_column] < self.time_start:
+                chunk = chunk[(chunk.iloc[:, time_column] >= self.time_start).values]
+
+            # rows that do not fill a group are carried over to the next chunk
+            if remainder is not None:
+                chunk = pd.concat([remainder, chunk], ignore_index=True)
+            n_grouped = len(chunk) if past_end else len(chunk) // self.stride * self.stride
+            remainder = chunk.iloc[n_grouped:]
+            parts.append(self.reduce(chunk.iloc[:n_grouped], time_column))
+            if past_end:
+                break
+
+        if remainder is not None and len(remainder) > 0:
+            parts.append(self.reduce(remainder, time_column))
+        if not parts:
+            # no chunks are read from a file without data rows by some versions of pandas - parse just its header
+            # instead, so the empty frame keeps the columns callers index
+            if not isinstance(source, str):
+                source.seek(0)
+            return pd.read_csv(source, nrows=0, **kwargs)
+        return pd.concat(parts, ignore_index=True)
+
+    def apply(self, times: np.ndarray, values: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+        # apply the window to a series that is already in memory
+        if not self.active:
+            return times, values
+        in_range = np.ones(len(times), dtype=bool)
+        if self.time_start is not None:
+            in_range &= times >= self.time_start
+        if self.time_end is not None:
+            in_range &= times < self.time_end
+        frame = self.reduce(pd.DataFrame({0: times[in_range], 1: values[in_range]}), 0)
+        return frame[0].values, frame[1].values
+
+    def reduce(self, frame: pd.DataFrame, time_column: int) -> pd.DataFrame:
+        # reduce each group of stride consecutive rows to one row
+        if self.stride == 1 or len(frame) == 0:
+            return frame
+
+        starts = np.arange(0, len(frame), self.stride)
+        if self.aggregation == 'first':
+            return frame.iloc[starts].reset_index(drop=True)
+
+        columns = {}
+        for column_index in range(frame.shape[1]):
+            values = frame.iloc[:, column_index].values
+            if column_index == time_column or values.dtype.kind not in 'fiu':
+                columns[column_index] = values[starts]
+            else:
+                columns[column_index] = self._reduce_values(values, starts)
+        reduced = pd.DataFrame(columns)
+        reduced.columns = frame.columns
+        return reduced
+
+    def _reduce_values(self, values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+        # missing values are skipped by min, max and mean, matching pandas
+        if self.aggregation == 'last':
+            return values[np.minimum(starts + self.stride, len(values)) - 1]
+        if self.aggregation == 'min':
+            return np.fmin.reduceat(values, starts)
+        if self.aggregation == 'max':
+            return np.fmax.reduceat(values, starts)
+
+        dtype = values.dtype if values.dtype.kind == 'f' else np.float64
+        present = ~np.isnan(values) if values.dtype.kind == 'f' else np.ones(len(values), dtype=bool)
+        totals = np.add.reduceat(np.where(present, values, 0).astype(dtype), starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return totals / np.add.reduceat(present, starts).astype(dtype)
+
+
+# keeps every row of a series
+NO_WINDOW = SeriesWindow()
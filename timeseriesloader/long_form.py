@@ -0,0 +1,78 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+__all__ = ('LAYOUTS', 'build_long_form', 'build_series_resource')
+
+# dense copies each main resource value onto every timestep row, categorical stores the string columns as
+# codes into their distinct values, and side_resource leaves them out of the long form table entirely
+LAYOUTS = ('dense', 'categorical', 'side_resource')
+
+
+def build_long_form(main_resource: pd.DataFrame,
+                    series_frames: typing.Sequence[pd.DataFrame],
+                    layout: str = 'dense') -> pd.DataFrame:
+    """
+    Stacks the series frames, one per main resource row, into a single long form table.  Each timestep
+    row starts with the columns of its main resource row, followed by a series_id column holding the main
+    resource index and then the columns of the series file.  With the side_resource layout only the
+    series_id is kept, and the main resource columns are found through build_series_resource.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError('unsupported layout ' + str(layout))
+
+    main_columns = [] if layout == 'side_resource' else list(main_resource.columns)
+    if len(series_frames) == 0:
+        return pd.DataFrame(columns=main_columns + ['series_id'])
+
+    # stack the series once, and broadcast each main resource row (plus its series id) across its timesteps
+    repeats = np.repeat(np.arange(len(main_resource)), [len(frame) for frame in series_frames])
+    if layout == 'dense':
+        broadcast = main_resource.iloc[repeats].reset_index(drop=True)
+    elif layout == 'categorical':
+        broadcast = pd.DataFrame({column_index: _broadcast_categorical(main_resource.iloc[:, column_index], repeats)
+                                  for column_index in range(main_resource.shape[1])})
+        broadcast.columns = main_resource.columns
+    else:
+        broadcast = pd.DataFrame(index=pd.RangeIndex(len(repeats)))
+    broadcast['series_id'] = main_resource.index.values[repeats].astype(int)
+    series_data = pd.concat(series_frames, ignore_index=True)
+
+    return pd.concat([broadcast, series_data], axis=1)
+
+
+def build_series_resource(main_resource: pd.DataFrame) -> pd.DataFrame:
+    """
+    The main resource with the series_id column of the side_resource layout appended, holding one row
+    per series rather than one per timestep.
+    """
+    series_resource = main_resource.reset_index(drop=True)
+    series_resource['series_id'] = main_resource.index.values.astype(int)
+    return series_resource
+
+
+def _broadcast_categorical(column: pd.Series, repeats: np.ndarray) -> pd.Series:
+    # string columns are encoded once per series and only their codes are repeated, other columns are copied
+    if column.dtype.kind != 'O':
+        return pd.Series(column.values[repeats])
+
+    codes, categories = pd.factorize(column.values)
+    codes = codes.astype(np.result_type(np.min_scalar_type(-1), np.min_scalar_type(len(categories))))
+    return pd.Series(pd.Categorical.from_codes(codes[repeats], categories))
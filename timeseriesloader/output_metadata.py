@@ -0,0 +1,110 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+
+from d3m import container
+from d3m.metadata import base as metadata_base
+
+__all__ = ('dataframe_metadata', 'dataset_metadata', 'copy_column_metadata', 'dtype_column_metadata')
+
+# column metadata fields that are carried over from the main resource - foreign keys are dropped as they
+# refer to resources that are not part of the output
+_COPIED_FIELDS = ('name', 'structural_type', 'semantic_types')
+
+ColumnsMetadata = typing.Sequence[typing.Dict[str, typing.Any]]
+
+
+def dataframe_metadata(n_rows: int,
+                       columns: ColumnsMetadata = None,
+                       all_columns: typing.Dict[str, typing.Any] = None,
+                       n_columns: int = None,
+                       metadata: metadata_base.DataMetadata = None,
+                       at: metadata_base.Selector = ()) -> metadata_base.DataMetadata:
+    """
+    Builds the metadata of an output dataframe from what is already known about its columns, instead of
+    generating it by inspecting the values.  Columns are described either individually by `columns`, or
+    all at once by `all_columns` along with `n_columns` - a single entry that is cheap to build and store
+    for wide frames of a single type.  Entries are added to `metadata` under the `at` selector if given.
+    """
+    if columns is not None:
+        n_columns = len(columns)
+
+    if metadata is None:
+        metadata = metadata_base.DataMetadata()
+
+    table_metadata = {
+        'structural_type': container.DataFrame,
+        'semantic_types': ['https://metadata.datadrivendiscovery.org/types/Table'],
+        'dimension': {
+            'name': 'rows',
+            'semantic_types': ['https://metadata.datadrivendiscovery.org/types/TabularRow'],
+            'length': n_rows,
+        },
+    }
+    if at == ():
+        table_metadata['schema'] = metadata_base.CONTAINER_SCHEMA_VERSION
+    metadata = metadata.update(tuple(at), table_metadata)
+    metadata = metadata.update(tuple(at) + (metadata_base.ALL_ELEMENTS,), {
+        'dimension': {
+            'name': 'columns',
+            'semantic_types': ['https://metadata.datadrivendiscovery.org/types/TabularColumn'],
+            'length': n_columns,
+        },
+    })
+
+    if all_columns is not None:
+        metadata = metadata.update(tuple(at) + (metadata_base.ALL_ELEMENTS, metadata_base.ALL_ELEMENTS), all_columns)
+    for column_index, column_metadata in enumerate(columns or ()):
+        metadata = metadata.update(tuple(at) + (metadata_base.ALL_ELEMENTS, column_index), column_metadata)
+
+    return metadata
+
+
+def dataset_metadata(resources: typing.Mapping[str, typing.Tuple[int, ColumnsMetadata]]) -> metadata_base.DataMetadata:
+    """
+    Builds the metadata of an output dataset of dataframe resources, given the row count and column
+    metadata of each resource keyed by resource id.
+    """
+    metadata = metadata_base.DataMetadata({
+        'schema': metadata_base.CONTAINER_SCHEMA_VERSION,
+        'structural_type': container.Dataset,
+        'dimension': {
+            'name': 'resources',
+            'semantic_types': ['https://metadata.datadrivendiscovery.org/types/DatasetResource'],
+            'length': len(resources),
+        },
+    })
+    for resource_id, (n_rows, columns) in resources.items():
+        metadata = dataframe_metadata(n_rows, columns, metadata=metadata, at=(resource_id,))
+    return metadata
+
+
+def copy_column_metadata(inputs_metadata: metadata_base.DataMetadata,
+                         column_index: int,
+                         at: metadata_base.Selector = ()) -> typing.Dict[str, typing.Any]:
+    # the carried over fields of an input column's metadata
+    column_metadata = inputs_metadata.query(tuple(at) + (metadata_base.ALL_ELEMENTS, column_index))
+    return {field: column_metadata[field] for field in _COPIED_FIELDS if field in column_metadata}
+
+
+def dtype_column_metadata(name: typing.Any, dtype: typing.Any) -> typing.Dict[str, typing.Any]:
+    # metadata for a column of a known numpy dtype - names are only recorded when they are strings,
+    # matching generated metadata, and object columns parsed from csv files hold strings
+    column_metadata: typing.Dict[str, typing.Any] = {'structural_type': str if dtype.kind == 'O' else dtype.type}
+    if isinstance(name, str):
+        column_metadata['name'] = name
+    return column_metadata
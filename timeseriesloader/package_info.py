@@ -0,0 +1,86 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import functools
+import os
+import typing
+
+__all__ = ('git_commit',)
+
+_PACKAGE_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+@functools.lru_cache(maxsize=None)
+def git_commit() -> str:
+    """
+    Returns the git commit the package is installed from, for the installation entry of the primitive
+    metadata.  The commit is read straight from the repository's HEAD and refs files, avoiding the cost
+    of loading a git library each time a primitive module is imported, and is cached for the process.
+    Falls back to the d3m helper for repository layouts this doesn't handle.
+    """
+    commit = _read_git_commit(_PACKAGE_PATH)
+    if commit is not None:
+        return commit
+
+    from d3m import utils as d3m_utils
+    return d3m_utils.current_git_commit(_PACKAGE_PATH)
+
+
+def _read_git_commit(path: str) -> typing.Optional[str]:
+    git_dir = _find_git_dir(path)
+    if git_dir is None:
+        return None
+
+    head = _read_file(os.path.join(git_dir, 'HEAD'))
+    if head is None:
+        return None
+    if not head.startswith('ref:'):
+        # detached head
+        return head
+
+    ref = head[len('ref:'):].strip()
+    commit = _read_file(os.path.join(git_dir, *ref.split('/')))
+    if commit is not None:
+        return commit
+
+    packed_refs = _read_file(os.path.join(git_dir, 'packed-refs'))
+    for line in (packed_refs or '').splitlines():
+        fields = line.split()
+        if len(fields) == 2 and fields[1] == ref:
+            return fields[0]
+    return None
+
+
+def _find_git_dir(path: str) -> typing.Optional[str]:
+    # search upwards for the repository, leaving worktrees and submodules (where .git is a file) to d3m
+    while True:
+        git_dir = os.path.join(path, '.git')
+        if os.path.isdir(git_dir):
+            return git_dir
+        if os.path.exists(git_dir):
+            return None
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _read_file(path: str) -> typing.Optional[str]:
+    try:
+        with open(path, 'r') as ref_file:
+            return ref_file.read().strip()
+    except OSError:
+        return None
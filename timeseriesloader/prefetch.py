@@ -0,0 +1,287 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+import asyncio
+import concurrent.futures
+import ssl
+import threading
+import urllib.parse
+
+from timeseriesloader import series_source
+
+__all__ = ('iter_prefetch',)
+
+T = typing.TypeVar('T')
+
+# (host key, reader, writer) for an open http connection
+_Connection = typing.Tuple[typing.Tuple[str, str, int], asyncio.StreamReader, asyncio.StreamWriter]
+
+# files that may be fetched or parsed ahead of the consumer, per concurrent fetch
+_READ_AHEAD_PER_FETCH = 4
+
+# bytes read from a response at a time, each read bounded by the fetch timeout
+_READ_SIZE = 1 << 20
+
+# seconds to wait for a connection to open, or for each read of a response, before the fetch fails
+_FETCH_TIMEOUT = 60.0
+
+
+def iter_prefetch(paths: typing.Sequence[str],
+                  read_fn: typing.Callable[[str], T],
+                  concurrency: int,
+                  read_ahead: int = None,
+                  timeout: float = _FETCH_TIMEOUT) -> typing.Generator[typing.Tuple[int, typing.Union[T, Exception]],
+                                                                       None, None]:
+    """
+    Fetches the series files at `paths` on an asyncio event loop running in a background thread, with at most
+    `concurrency` fetches in flight, and applies `read_fn` to each file as it arrives on a pool of `concurrency`
+    threads.  `read_fn` is passed a series_source.Prefetched holding the fetched content in place of the path.
+    Yields (position, result) tuples in the order of `paths`, where the result is the exception raised when a
+    file could not be fetched or read.  At most `read_ahead` files are fetched or read ahead of the consumer.
+
+    Files on http(s) servers are fetched over keep-alive connections that are reused for later files on the
+    same host, and plain local files are read on the thread pool.  Compressed and archived local files, and
+    other remote schemes, are passed to `read_fn` as plain paths.  An http fetch fails with a TimeoutError
+    when opening a connection or any read of the response takes longer than `timeout` seconds, so a stalled
+    server can't block the consumer.  Fetching stops when the consumer closes the iterator.
+    """
+    if len(paths) == 0:
+        return
+    concurrency = max(1, concurrency)
+    read_ahead = max(concurrency, read_ahead or concurrency * _READ_AHEAD_PER_FETCH)
+    prefetcher = _Prefetcher(paths, read_fn, concurrency, read_ahead, timeout)
+    try:
+        for idx, result in enumerate(prefetcher.results):
+            read_result = result.result()
+            prefetcher.consumed(idx)
+            yield idx, read_result
+    finally:
+        prefetcher.close()
+
+
+class _Prefetcher:
+    # runs the fetches and reads for iter_prefetch, resolving a future per path
+    def __init__(self,
+                 paths: typing.Sequence[str],
+                 read_fn: typing.Callable[[str], typing.Any],
+                 concurrency: int,
+                 read_ahead: int,
+                 timeout: float) -> None:
+        self.paths = list(paths)
+        self._read_fn = read_fn
+        self.results: typing.List[concurrent.futures.Future] = [concurrent.futures.Future() for _ in self.paths]
+        self._concurrency = concurrency
+        self._read_ahead = read_ahead
+        self._timeout = timeout
+        self._window: typing.Optional[asyncio.Semaphore] = None
+
+        # the loop is only closed, and only called into from the consumer, while holding the lock
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+        self._fetch_all_task = self._loop.create_task(self._fetch_all())
+        self._thread = threading.Thread(target=self._run, name='series-prefetch', daemon=True)
+        self._thread.start()
+
+    def consumed(self, idx: int) -> None:
+        # let the next file past the read ahead window be fetched, if there is one still to start
+        if idx + self._read_ahead < len(self.paths):
+            self._call_soon(self._window.release)  # type: ignore
+
+    def close(self) -> None:
+        self._call_soon(self._fetch_all_task.cancel)
+        self._thread.join()
+
+    def _call_soon(self, callback: typing.Callable[[], typing.Any]) -> None:
+        with self._lock:
+            if not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(callback)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._fetch_all_task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            with self._lock:
+                self._loop.close()
+            self._executor.shutdown(wait=False)
+
+    async def _fetch_all(self) -> None:
+        # start the fetches in order as the read ahead window allows, each waiting for a free connection slot
+        self._window = asyncio.Semaphore(self._read_ahead)
+        in_flight = asyncio.Semaphore(self._concurrency)
+        connections = _ConnectionPool(self._timeout)
+        tasks = []
+        try:
+            for idx, path in enumerate(self.paths):
+                await self._window.acquire()
+                tasks.append(self._loop.create_task(self._read(idx, path, in_flight, connections)))
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            connections.close()
+            # let the closed connections finish shutting down before the loop is closed
+            await asyncio.sleep(0)
+
+    async def _read(self,
+                    idx: int,
+                    path: str,
+                    in_flight: asyncio.Semaphore,
+                    connections: '_ConnectionPool') -> None:
+        # the fetch slot is released as soon as the file has arrived, leaving it to be parsed on the pool
+        try:
+            async with in_flight:
+                fetched = await self._fetch(path, connections)
+            read_result = await self._loop.run_in_executor(self._executor, self._read_fn, fetched)
+        except Exception as error:
+            read_result = error
+        self.results[idx].set_result(read_result)
+
+    async def _fetch(self, path: str, connections: '_ConnectionPool') -> str:
+        location = series_source.locate(path)
+        if location.plain and location.path is not None:
+            content = await self._loop.run_in_executor(self._executor, _read_file, location.path)
+            return series_source.Prefetched(path, content)
+        if location.path is None and urllib.parse.urlsplit(path).scheme in ('http', 'https'):
+            return series_source.Prefetched(path, await connections.get(path))
+        return path
+
+
+class _ConnectionPool:
+    # idle http keep-alive connections per host, which later requests to the same host reuse
+    def __init__(self, timeout: float) -> None:
+        self._timeout = timeout
+        self._idle: typing.Dict[typing.Tuple[str, str, int], typing.List[_Connection]] = {}
+        self._ssl_context: typing.Optional[ssl.SSLContext] = None
+
+    async def get(self, url: str) -> bytes:
+        parsed = urllib.parse.urlsplit(url)
+        key = (parsed.scheme, parsed.hostname or '', parsed.port or (443 if parsed.scheme == 'https' else 80))
+        target = (parsed.path or '/') + ('?' + parsed.query if parsed.query else '')
+
+        # an idle connection may have been closed by the server, in which case the request is retried once
+        # on a new connection
+        idle = self._idle.get(key)
+        if idle:
+            connection = idle.pop()
+            try:
+                return await self._request(connection, target, parsed.netloc, url)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                connection[2].close()
+        return await self._request(await self._connect(key), target, parsed.netloc, url)
+
+    def close(self) -> None:
+        for connections in self._idle.values():
+            for _, _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+    async def _connect(self, key: typing.Tuple[str, str, int]) -> _Connection:
+        scheme, host, port = key
+        context = None
+        if scheme == 'https':
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            context = self._ssl_context
+        reader, writer = await self._wait(asyncio.open_connection(host, port, ssl=context), 'connecting to ' + host)
+        return key, reader, writer
+
+    async def _request(self, connection: _Connection, target: str, host: str, url: str) -> bytes:
+        key, reader, writer = connection
+        action = 'fetching ' + url
+        try:
+            writer.write('GET {target} HTTP/1.1\r\nHost: {host}\r\nAccept-Encoding: identity\r\n\r\n'
+                         .format(target=target, host=host).encode('latin-1'))
+            await self._wait(writer.drain(), action)
+
+            status_line = await self._wait(reader.readline(), action)
+            if not status_line:
+                raise ConnectionResetError('connection closed by ' + host)
+            version, status = status_line.decode('latin-1').split(None, 2)[:2]
+            headers = {}
+            while True:
+                line = await self._wait(reader.readline(), action)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            # the connection is only reused when the end of the body is known and the server keeps it open
+            reusable = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+            if headers.get('transfer-encoding', '').lower() == 'chunked':
+                body = await self._read_chunked(reader, action)
+            elif 'content-length' in headers:
+                body = await self._read_exactly(reader, int(headers['content-length']), action)
+            else:
+                body = await self._read_to_end(reader, action)
+                reusable = False
+        except BaseException:
+            writer.close()
+            raise
+
+        if reusable:
+            self._idle.setdefault(key, []).append(connection)
+        else:
+            writer.close()
+        if status != '200':
+            raise OSError('HTTP status ' + status + ' fetching ' + url)
+        return body
+
+    async def _wait(self, awaitable: typing.Awaitable[T], action: str) -> T:
+        # the timeout bounds each step rather than the whole response, so large files aren't cut off
+        try:
+            return await asyncio.wait_for(awaitable, self._timeout)
+        except asyncio.TimeoutError:
+            message = 'timed out after {timeout}s {action}'.format(timeout=self._timeout, action=action)
+            raise TimeoutError(message) from None
+
+    async def _read_exactly(self, reader: asyncio.StreamReader, size: int, action: str) -> bytes:
+        chunks: typing.List[bytes] = []
+        while size > 0:
+            chunk = await self._wait(reader.readexactly(min(size, _READ_SIZE)), action)
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    async def _read_to_end(self, reader: asyncio.StreamReader, action: str) -> bytes:
+        chunks: typing.List[bytes] = []
+        while True:
+            chunk = await self._wait(reader.read(_READ_SIZE), action)
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+
+    async def _read_chunked(self, reader: asyncio.StreamReader, action: str) -> bytes:
+        chunks: typing.List[bytes] = []
+        while True:
+            size = int((await self._wait(reader.readline(), action)).split(b';')[0].strip(), 16)
+            if size == 0:
+                # skip any trailers up to the blank line ending the body
+                while (await self._wait(reader.readline(), action)) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self._read_exactly(reader, size, action))
+            await self._wait(reader.readline(), action)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as series_file:
+        return series_file.read()
@@ -0,0 +1,157 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+import collections
+import contextlib
+import heapq
+import os
+import threading
+import time
+
+from timeseriesloader import series_source
+
+__all__ = ('ProduceProfile', 'NULL_PROFILE', 'add_hook', 'remove_hook')
+
+ProfileHook = typing.Callable[[str, typing.Dict[str, typing.Any]], None]
+
+_hooks: typing.List[ProfileHook] = []
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook: ProfileHook) -> None:
+    """
+    Registers a callable that is passed the primitive name and the report of every profiled call, so
+    the numbers can be forwarded to an external metrics collector.
+    """
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+def remove_hook(hook: ProfileHook) -> None:
+    with _hooks_lock:
+        _hooks.remove(hook)
+
+
+class ProduceProfile:
+    """
+    Collects per-stage wall times and per-file read statistics for a single call on a primitive.  The
+    time recorded for each file covers both reading and parsing it, and is measured where the file is
+    read, so with a worker pool the file times sum to more than the wall time of the load stage.
+    """
+
+    enabled = True
+
+    def __init__(self, slowest_count: int = 10) -> None:
+        self.stages: typing.Dict[str, float] = collections.OrderedDict()
+        self.files = 0
+        self.bytes_read = 0
+        self.file_seconds = 0.0
+        self._slowest_count = slowest_count
+        self._slowest: typing.List[typing.Tuple[float, str]] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> typing.Iterator[None]:
+        # time a stage of the call, adding to the stage total if it is entered more than once
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def record_file(self, path: str, seconds: float) -> None:
+        self.files += 1
+        self.file_seconds += seconds
+        # bytes read are counted for local files, compressed or not, but not for archive members
+        location = series_source.locate(path)
+        if location.path is not None and location.member is None:
+            try:
+                self.bytes_read += os.path.getsize(location.path)
+            except OSError:
+                pass
+
+        # keep the slowest files in a bounded min heap
+        if len(self._slowest) < self._slowest_count:
+            heapq.heappush(self._slowest, (seconds, path))
+        else:
+            heapq.heappushpop(self._slowest, (seconds, path))
+
+    def report(self) -> typing.Dict[str, typing.Any]:
+        return {
+            'stages': dict(self.stages),
+            'files': self.files,
+            'bytes_read': self.bytes_read,
+            'file_seconds': self.file_seconds,
+            'slowest_files': [{'path': path, 'seconds': seconds}
+                              for seconds, path in sorted(self._slowest, reverse=True)],
+        }
+
+    def finish(self, primitive_name: str) -> typing.Dict[str, typing.Any]:
+        # build the report and pass it to the registered hooks
+        report = self.report()
+        with _hooks_lock:
+            hooks = list(_hooks)
+        for hook in hooks:
+            hook(primitive_name, report)
+        return report
+
+
+class _NullProfile(ProduceProfile):
+    """
+    Stand in used when profiling is turned off, where every operation is a no-op.
+    """
+
+    enabled = False
+
+    def __init__(self) -> None:
+        super().__init__(0)
+
+    def stage(self, name: str) -> typing.ContextManager[None]:  # type: ignore
+        return _NULL_CONTEXT
+
+    def record_file(self, path: str, seconds: float) -> None:
+        pass
+
+    def finish(self, primitive_name: str) -> typing.Dict[str, typing.Any]:
+        return {}
+
+
+class _NullContext:
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *args: typing.Any) -> None:
+        return None
+
+
+_NULL_CONTEXT = _NullContext()
+
+NULL_PROFILE: ProduceProfile = _NullProfile()
+
+
+class TimedRead:
+    """
+    Wraps a read function so that it returns its result along with the time it took.  Picklable whenever
+    the wrapped function is, so it can be used with a process pool.
+    """
+
+    def __init__(self, read_fn: typing.Callable[[str], typing.Any]) -> None:
+        self.read_fn = read_fn
+
+    def __call__(self, path: str) -> typing.Tuple[typing.Any, float]:
+        start = time.perf_counter()
+        result = self.read_fn(path)
+        return result, time.perf_counter() - start
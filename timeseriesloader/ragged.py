@@ -0,0 +1,83 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+
+import numpy as np  # type: ignore
+
+__all__ = ('RaggedSeries',)
+
+
+class RaggedSeries:
+    """
+    A collection of series of unequal length, stored as flat arrays of timestamps and values along with
+    an offsets array - series i occupies positions offsets[i] to offsets[i + 1].  Memory is proportional to
+    the number of observations, and an aligned dense matrix is only built when requested with to_dense.
+    """
+
+    def __init__(self, times: np.ndarray, values: np.ndarray, offsets: np.ndarray) -> None:
+        if len(offsets) == 0 or offsets[-1] != len(values) or len(times) != len(values):
+            raise ValueError('offsets do not match the length of the times and values')
+        self.times = times
+        self.values = values
+        self.offsets = offsets
+
+    @classmethod
+    def from_series(cls,
+                    series: typing.Iterable[typing.Tuple[int, typing.Tuple[np.ndarray, np.ndarray]]],
+                    n_series: int,
+                    dtype: str = 'float64') -> 'RaggedSeries':
+        # pack (position, (times, values)) tuples, which may arrive in any order, into flat arrays
+        all_times: typing.List[typing.Optional[np.ndarray]] = [None] * n_series
+        all_values: typing.List[typing.Optional[np.ndarray]] = [None] * n_series
+        for idx, (times, values) in series:
+            all_times[idx] = np.asarray(times)
+            all_values[idx] = np.asarray(values, dtype=dtype)
+
+        lengths = [0 if values is None else len(values) for values in all_values]
+        offsets = np.zeros(n_series + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        present_times = [times for times in all_times if times is not None]
+        present_values = [values for values in all_values if values is not None]
+        times = np.concatenate(present_times) if present_times else np.empty(0)
+        values = np.concatenate(present_values) if present_values else np.empty(0, dtype=dtype)
+        return cls(times, values, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def series(self, idx: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+        # views of the timestamps and values of a single series
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        return self.times[start:end], self.values[start:end]
+
+    def to_dense(self) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Aligns the series on the sorted union of their timestamps, returning the union and a
+        (series, timestamps) matrix in which timestamps missing from a series are NaN.  Values with a
+        column per channel give a (series, timestamps, channels) array.
+        """
+        timestamps = np.unique(self.times)
+        matrix = np.full((len(self), len(timestamps)) + self.values.shape[1:], np.nan,
+                         dtype=np.result_type(self.values.dtype, np.float32))
+        rows = np.repeat(np.arange(len(self)), self.lengths)
+        matrix[rows, np.searchsorted(timestamps, self.times)] = self.values
+        return timestamps, matrix
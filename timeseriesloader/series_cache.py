@@ -0,0 +1,179 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+import os
+import collections
+import hashlib
+import tempfile
+import threading
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import series_source
+
+__all__ = ('SeriesCache',)
+
+SeriesData = typing.Union[pd.DataFrame, typing.Tuple[np.ndarray, ...]]
+
+_SUFFIX = '.npz'
+_FRAME_MARKER = '__frame_columns__'
+
+
+class SeriesCache:
+    """
+    On-disk cache of parsed series files, shared across primitive instances and pipeline runs.  Each entry
+    holds the arrays parsed from one file, stored uncompressed in the numpy binary format so it can be
+    loaded back without any text parsing.  Entries are keyed on the absolute path, size and modification
+    time of the source file along with a spec describing the columns that were extracted, so a changed
+    file is never served stale.  Once the total size of the entries exceeds `max_bytes` the least recently
+    used entries are evicted.  The `hits`, `misses` and `evictions` counters track activity for this
+    instance.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        # entry sizes, ordered from least to most recently used
+        os.makedirs(cache_dir, exist_ok=True)
+        entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(_SUFFIX)]
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        self._entries: 'collections.OrderedDict[str, int]' = collections.OrderedDict(
+            (entry.name, entry.stat().st_size) for entry in entries)
+        self._size = sum(self._entries.values())
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def stats(self) -> typing.Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._size,
+        }
+
+    def key(self, uri: str, spec: str) -> typing.Optional[str]:
+        # build the entry name for a source file, or None if the file can't be cached - archive members are
+        # keyed on the archive file along with the member name
+        location = series_source.locate(uri)
+        if location.path is None:
+            return None
+        path = os.path.abspath(location.path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if location.member is not None:
+            path = path + '\0' + location.member
+        digest = hashlib.sha1('\0'.join((path, str(stat.st_size), str(stat.st_mtime_ns), spec)).encode('utf-8'))
+        return digest.hexdigest() + _SUFFIX
+
+    def contains(self, key: typing.Optional[str]) -> bool:
+        return key is not None and key in self._entries
+
+    def get(self, key: typing.Optional[str]) -> typing.Optional[SeriesData]:
+        if key is None or key not in self._entries:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        entry_path = os.path.join(self.cache_dir, key)
+        try:
+            with np.load(entry_path, allow_pickle=False) as arrays:
+                data = _from_arrays(arrays)
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            # entry was removed or damaged by another process - treat as a miss
+            with self._lock:
+                self._drop(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return data
+
+    def put(self, key: typing.Optional[str], data: SeriesData) -> None:
+        if key is None:
+            return
+        arrays = _to_arrays(data)
+        if arrays is None:
+            return
+
+        # write to a temporary file and move it into place so readers never see a partial entry
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                np.savez(temp_file, **arrays)
+            entry_size = os.path.getsize(temp_path)
+            os.replace(temp_path, os.path.join(self.cache_dir, key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = entry_size
+            self._size += entry_size
+            self._evict()
+
+    def _drop(self, key: str) -> None:
+        self._size -= self._entries.pop(key, 0)
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._drop(key)
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.cache_dir, key))
+            except OSError:
+                pass
+
+
+def _to_arrays(data: SeriesData) -> typing.Optional[typing.Dict[str, np.ndarray]]:
+    # flatten a parsed series into named arrays, returning None for anything that would need pickling
+    if isinstance(data, pd.DataFrame):
+        if any(not isinstance(column, str) for column in data.columns):
+            return None
+        arrays = {'col_' + str(idx): data.iloc[:, idx].values for idx in range(data.shape[1])}
+        arrays[_FRAME_MARKER] = np.array(list(data.columns), dtype=str)
+    else:
+        arrays = {'arr_' + str(idx): np.asarray(array) for idx, array in enumerate(data)}
+
+    if any(array.dtype.hasobject for array in arrays.values()):
+        return None
+    return arrays
+
+
+def _from_arrays(arrays: typing.Mapping[str, np.ndarray]) -> SeriesData:
+    if _FRAME_MARKER in arrays.keys():
+        columns = [str(column) for column in arrays[_FRAME_MARKER]]
+        return pd.DataFrame(collections.OrderedDict(
+            (column, arrays['col_' + str(idx)]) for idx, column in enumerate(columns)))
+    return tuple(arrays['arr_' + str(idx)] for idx in range(len(arrays.keys())))
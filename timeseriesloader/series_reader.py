@@ -0,0 +1,249 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+import collections
+import concurrent.futures
+
+from d3m import exceptions
+
+from timeseriesloader import profiling, series_cache
+
+__all__ = ('SeriesReadError', 'ReadStats', 'iter_read')
+
+T = typing.TypeVar('T')
+
+
+class SeriesReadError(exceptions.InvalidArgumentValueError):
+    """
+    Raised once all series files have been attempted, when one or more of them could not be read.
+    The failures are available as a list of (path, exception) tuples in `errors`.
+    """
+
+    def __init__(self, errors: typing.Sequence[typing.Tuple[str, BaseException]]) -> None:
+        self.errors = list(errors)
+        super().__init__('failed to read ' + str(len(self.errors)) + ' series file(s): ' +
+                         '; '.join(path + ' (' + repr(error) + ')' for path, error in self.errors))
+
+
+class ReadStats:
+    """
+    Counts of the series files requested from iter_read, and how many distinct files were actually read,
+    along with the number of series reused from the snapshot of an earlier incremental read.
+    """
+
+    def __init__(self) -> None:
+        self.requested = 0
+        self.read = 0
+        self.reused = 0
+
+    @property
+    def saved(self) -> int:
+        return self.requested - self.read
+
+    def as_dict(self) -> typing.Dict[str, int]:
+        return {'requested': self.requested, 'read': self.read, 'saved': self.saved, 'reused': self.reused}
+
+
+def iter_read(paths: typing.Sequence[str],
+              read_fn: typing.Callable[[str], T],
+              workers: int = 1,
+              backend: str = 'thread',
+              cache: series_cache.SeriesCache = None,
+              cache_spec: str = '',
+              stats: ReadStats = None,
+              profile: profiling.ProduceProfile = profiling.NULL_PROFILE
+              ) -> typing.Generator[typing.Tuple[int, T], None, None]:
+    """
+    Applies `read_fn` to each path, yielding (position, result) tuples in the order of `paths`.  Files
+    are read concurrently when `workers` is greater than 1, using a thread or process pool depending on
+    `backend` - the process pool requires `read_fn` to be picklable.  The async backend instead fetches up
+    to `workers` files at a time on an event loop, passing `read_fn` a series_source.Prefetched holding the
+    content of each file in place of its path.  Failures do not stop the remaining
+    reads; they are collected and raised together as a SeriesReadError after the last result is yielded.
+    When a cache is supplied, results stored under `cache_spec` are loaded from it instead of calling
+    `read_fn`, and newly read results are added to it.
+
+    A path that appears more than once is only read once, and the same result object is yielded for each
+    of its positions - callers must not modify results in place.  Counts are added to `stats` if given,
+    and the time taken by each file read is recorded in `profile`.
+    """
+    unique_paths = list(collections.OrderedDict.fromkeys(paths))
+    slots = {path: slot for slot, path in enumerate(unique_paths)}
+    path_slots = [slots[path] for path in paths]
+    if stats is not None:
+        stats.requested += len(paths)
+        stats.read += len(unique_paths)
+    if len(unique_paths) == len(paths):
+        yield from _iter_unique(paths, read_fn, workers, backend, cache, cache_spec, profile)
+        return
+
+    # results are held until the last position that uses them has been yielded
+    last_use = {slot: idx for idx, slot in enumerate(path_slots)}
+    results: typing.Dict[int, T] = {}
+    next_idx = 0
+
+    def _fan_out(resolved_slot: int) -> typing.Iterator[typing.Tuple[int, T]]:
+        # yield the positions in order, up to the first one whose file hasn't been resolved yet
+        nonlocal next_idx
+        while next_idx < len(paths) and path_slots[next_idx] <= resolved_slot:
+            slot = path_slots[next_idx]
+            if slot in results:
+                result = results[slot]
+                if last_use[slot] == next_idx:
+                    del results[slot]
+                yield next_idx, result
+            next_idx += 1
+
+    read_error: typing.Optional[SeriesReadError] = None
+    try:
+        for slot, result in _iter_unique(unique_paths, read_fn, workers, backend, cache, cache_spec, profile):
+            results[slot] = result
+            yield from _fan_out(slot)
+    except SeriesReadError as error:
+        read_error = error
+
+    yield from _fan_out(len(unique_paths))
+    if read_error is not None:
+        raise read_error
+
+
+def _iter_unique(paths: typing.Sequence[str],
+                 read_fn: typing.Callable[[str], T],
+                 workers: int,
+                 backend: str,
+                 cache: typing.Optional[series_cache.SeriesCache],
+                 cache_spec: str,
+                 profile: profiling.ProduceProfile) -> typing.Iterator[typing.Tuple[int, T]]:
+    if cache is None:
+        yield from _iter_read(paths, read_fn, workers, backend, profile)
+        return
+
+    # cache lookups and stores happen in the calling process so the counters stay accurate for any backend
+    keys = [cache.key(path, cache_spec) for path in paths]
+    miss_positions = [idx for idx, key in enumerate(keys) if not cache.contains(key)]
+    misses = _iter_read([paths[idx] for idx in miss_positions], read_fn, workers, backend, profile)
+    cache.misses += len(miss_positions)
+    hits = set(range(len(paths))).difference(miss_positions)
+
+    next_idx = 0
+    errors: typing.List[typing.Tuple[str, BaseException]] = []
+    try:
+        for miss_idx, result in misses:
+            idx = miss_positions[miss_idx]
+            yield from _iter_cached(paths, keys, hits, read_fn, cache, next_idx, idx, errors)
+            cache.put(keys[idx], result)  # type: ignore
+            yield idx, result
+            next_idx = idx + 1
+    except SeriesReadError as error:
+        errors.extend(error.errors)
+
+    # cached entries after the last successful read are still produced when some reads failed
+    yield from _iter_cached(paths, keys, hits, read_fn, cache, next_idx, len(paths), errors)
+    if errors:
+        raise SeriesReadError(errors)
+
+
+def _iter_cached(paths: typing.Sequence[str],
+                 keys: typing.Sequence[typing.Optional[str]],
+                 hits: typing.AbstractSet[int],
+                 read_fn: typing.Callable[[str], T],
+                 cache: series_cache.SeriesCache,
+                 start: int,
+                 stop: int,
+                 errors: typing.List[typing.Tuple[str, BaseException]]) -> typing.Iterator[typing.Tuple[int, T]]:
+    # yield the cached results with positions in [start, stop), adding the failures of any fallback reads to errors
+    for idx in range(start, stop):
+        if idx not in hits:
+            continue
+        result = cache.get(keys[idx])
+        if result is None:
+            # evicted since the lookup, so fall back to reading the file
+            try:
+                result = read_fn(paths[idx])
+            except Exception as error:
+                errors.append((paths[idx], error))
+                continue
+            cache.put(keys[idx], result)  # type: ignore
+        yield idx, result  # type: ignore
+
+
+def _iter_read(paths: typing.Sequence[str],
+               read_fn: typing.Callable[[str], T],
+               workers: int,
+               backend: str,
+               profile: profiling.ProduceProfile) -> typing.Iterator[typing.Tuple[int, T]]:
+    if profile.enabled:
+        # time each read where it happens, and record it back in the calling process
+        for idx, (result, seconds) in _iter_read(paths, profiling.TimedRead(read_fn), workers, backend,
+                                                 profiling.NULL_PROFILE):
+            profile.record_file(paths[idx], seconds)
+            yield idx, result
+        return
+
+    errors: typing.List[typing.Tuple[str, BaseException]] = []
+
+    if backend == 'async':
+        # files are fetched on an event loop and read on a thread pool as they arrive - imported here, as asyncio
+        # and ssl add to the import time of every primitive otherwise
+        from timeseriesloader import prefetch
+        reads = prefetch.iter_prefetch(paths, read_fn, workers)
+        try:
+            for idx, result in reads:
+                if isinstance(result, Exception):
+                    errors.append((paths[idx], result))
+                else:
+                    yield idx, result
+        finally:
+            # stop fetching when the caller stops early
+            reads.close()
+    elif workers <= 1 or len(paths) <= 1:
+        for idx, path in enumerate(paths):
+            try:
+                result = read_fn(path)
+            except Exception as error:
+                errors.append((path, error))
+                continue
+            yield idx, result
+    else:
+        if backend == 'process':
+            executor: concurrent.futures.Executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        elif backend == 'thread':
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        else:
+            raise exceptions.InvalidArgumentValueError('unsupported backend ' + str(backend))
+
+        with executor:
+            # futures are consumed in submission order, which keeps the output order deterministic
+            futures = collections.deque(executor.submit(read_fn, path) for path in paths)
+            idx = 0
+            try:
+                while futures:
+                    future = futures.popleft()
+                    try:
+                        result = future.result()
+                    except Exception as error:
+                        errors.append((paths[idx], error))
+                    else:
+                        yield idx, result
+                    idx += 1
+            finally:
+                # drop the queued reads when the caller stops early
+                for future in futures:
+                    future.cancel()
+
+    if errors:
+        raise SeriesReadError(errors)
@@ -0,0 +1,270 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+import collections
+import hashlib
+import os
+import tempfile
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from timeseriesloader import series_source
+
+__all__ = ('SeriesSnapshot', 'SnapshotStore', 'IncrementalRead', 'file_signature')
+
+# series are parsed as a tuple of arrays or as a dataframe
+SeriesData = typing.Union[pd.DataFrame, typing.Tuple[np.ndarray, ...]]
+
+# the size and modification time of a series file
+Signature = typing.Tuple[int, int]
+
+_SUFFIX = '.npz'
+
+
+def file_signature(uri: str) -> typing.Optional[Signature]:
+    # the size and modification time of a local series file, or of the archive holding it - None for remote
+    # and missing files, which are always parsed
+    location = series_source.locate(uri)
+    if location.path is None:
+        return None
+    try:
+        stat = os.stat(location.path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class SeriesSnapshot:
+    """
+    The series parsed by a call, along with a manifest of the files they came from.  The manifest maps the
+    uri, size and modification time of each file to a slot, and the rows of every slot are concatenated into
+    a single array per column, so a snapshot of any number of series is saved and loaded as a few arrays.
+    Series are tuples of arrays, or dataframes when `names` holds their column names.
+    """
+
+    def __init__(self,
+                 uris: typing.Sequence[str],
+                 signatures: np.ndarray,
+                 offsets: np.ndarray,
+                 columns: typing.Sequence[np.ndarray],
+                 names: typing.Optional[typing.Sequence[str]] = None) -> None:
+        self.uris = list(uris)
+        self.signatures = signatures
+        self.offsets = offsets
+        self.columns = list(columns)
+        self.names = None if names is None else list(names)
+        self._slots = {uri: slot for slot, uri in enumerate(self.uris)}
+
+    def __len__(self) -> int:
+        return len(self.uris)
+
+    @classmethod
+    def build(cls,
+              uris: typing.Sequence[str],
+              signatures: typing.Sequence[Signature],
+              series: typing.Sequence[SeriesData]) -> typing.Optional['SeriesSnapshot']:
+        # snapshot the series parsed from each of the uris, or None if they don't share the same columns
+        names = None
+        frames = [data for data in series if isinstance(data, pd.DataFrame)]
+        if len(frames) == len(series):
+            names = [str(column) for column in frames[0].columns] if frames else []
+            if any([str(column) for column in frame.columns] != names for frame in frames):
+                return None
+            arrays = [[frame.iloc[:, idx].values for idx in range(len(names))] for frame in frames]
+        elif not frames:
+            arrays = [list(data) for data in series]
+        else:
+            return None
+
+        n_columns = len(arrays[0]) if arrays else 0
+        if any(len(series_arrays) != n_columns for series_arrays in arrays):
+            return None
+        lengths = [len(series_arrays[0]) if n_columns else 0 for series_arrays in arrays]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        columns = [np.concatenate([series_arrays[idx] for series_arrays in arrays]) for idx in range(n_columns)]
+        return cls(uris, np.array(signatures, dtype=np.int64).reshape(-1, 2), offsets, columns, names)
+
+    def lookup(self, uri: str, signature: typing.Optional[Signature]) -> typing.Optional[int]:
+        # the slot holding the series of a file, or None if it isn't in the snapshot or has changed since
+        slot = self._slots.get(uri)
+        if slot is None or signature is None or tuple(self.signatures[slot]) != tuple(signature):
+            return None
+        return slot
+
+    def series(self, slot: int) -> SeriesData:
+        start, end = self.offsets[slot], self.offsets[slot + 1]
+        arrays = [column[start:end] for column in self.columns]
+        if self.names is None:
+            return tuple(arrays)
+        return pd.DataFrame(collections.OrderedDict(zip(self.names, arrays)))
+
+    def to_arrays(self) -> typing.Optional[typing.Dict[str, np.ndarray]]:
+        # flatten into named arrays, storing string columns as fixed width strings - None for columns holding
+        # anything else that would need pickling
+        arrays = {
+            'uris': np.array(self.uris, dtype=str),
+            'signatures': self.signatures,
+            'offsets': self.offsets,
+        }
+        if self.names is not None:
+            arrays['names'] = np.array(self.names, dtype=str)
+        for idx, column in enumerate(self.columns):
+            if not column.dtype.hasobject:
+                arrays['col_' + str(idx)] = column
+            elif all(isinstance(value, str) for value in column.ravel()):
+                arrays['str_' + str(idx)] = column.astype(str)
+            else:
+                return None
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: typing.Mapping[str, np.ndarray]) -> 'SeriesSnapshot':
+        keys = set(arrays.keys())
+        columns = []
+        for idx in range(len([key for key in keys if key.startswith(('col_', 'str_'))])):
+            if 'col_' + str(idx) in keys:
+                columns.append(arrays['col_' + str(idx)])
+            else:
+                columns.append(arrays['str_' + str(idx)].astype(object))
+        names = [str(name) for name in arrays['names']] if 'names' in keys else None
+        return cls([str(uri) for uri in arrays['uris']], arrays['signatures'], arrays['offsets'], columns, names)
+
+
+class SnapshotStore:
+    """
+    Directory holding the snapshot saved by the last call for each base uri and spec, where the spec describes
+    the columns extracted from each file as for SeriesCache.  Snapshots are stored uncompressed in the numpy
+    binary format, and replaced whole by each save.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, base_uri: str, spec: str) -> str:
+        return hashlib.sha1('\0'.join((base_uri, spec)).encode('utf-8')).hexdigest() + _SUFFIX
+
+    def load(self, key: str) -> typing.Optional[SeriesSnapshot]:
+        snapshot_path = os.path.join(self.directory, key)
+        if not os.path.exists(snapshot_path):
+            return None
+        try:
+            with np.load(snapshot_path, allow_pickle=False) as arrays:
+                return SeriesSnapshot.from_arrays(arrays)
+        except (OSError, ValueError, KeyError):
+            # damaged or written by an incompatible version - everything is parsed again
+            return None
+
+    def save(self, key: str, snapshot: SeriesSnapshot) -> bool:
+        arrays = snapshot.to_arrays()
+        if arrays is None:
+            return False
+
+        # write to a temporary file and move it into place so readers never see a partial snapshot
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                np.savez(temp_file, **arrays)
+            os.replace(temp_path, os.path.join(self.directory, key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return True
+
+    def open(self, base_uri: str, spec: str, paths: typing.Sequence[str]) -> 'IncrementalRead':
+        key = self.key(base_uri, spec)
+        return IncrementalRead(self, key, paths, self.load(key))
+
+
+class IncrementalRead:
+    """
+    A read of the series files at `paths` that takes the series of files unchanged since `snapshot` was saved
+    from the snapshot, so only new and changed files are parsed.  The series of each position are recorded as
+    they are merged, and saved as the snapshot for the next read once every position has been read.  Files are
+    checked before they are parsed, so a file changed while it is read is parsed again by the next read.
+    """
+
+    def __init__(self,
+                 store: SnapshotStore,
+                 key: str,
+                 paths: typing.Sequence[str],
+                 snapshot: typing.Optional[SeriesSnapshot]) -> None:
+        self.paths = list(paths)
+        self._store = store
+        self._key = key
+        self._snapshot = snapshot
+        self._signatures = [file_signature(path) for path in self.paths]
+        self._slots = [None if snapshot is None else snapshot.lookup(path, signature)
+                       for path, signature in zip(self.paths, self._signatures)]
+        self._series: typing.List[typing.Optional[SeriesData]] = [None] * len(self.paths)
+
+    def changed_paths(self, start: int = 0) -> typing.List[str]:
+        # the paths that have to be parsed from the start position onwards, in order
+        return [self.paths[idx] for idx in self._changed_positions(start)]
+
+    def n_unchanged(self, start: int = 0) -> int:
+        return sum(slot is not None for slot in self._slots[start:])
+
+    def merge(self,
+              parsed: typing.Iterator[typing.Tuple[int, SeriesData]],
+              start: int = 0) -> typing.Iterator[typing.Tuple[int, SeriesData]]:
+        """
+        Yields (position, series) tuples for each position from `start` onwards, in order, taking unchanged
+        series from the snapshot and the others from `parsed`, which yields (index, series) tuples for each
+        of the changed_paths in order.
+        """
+        positions = self._changed_positions(start)
+        next_idx = start
+        try:
+            for parsed_idx, data in parsed:
+                position = positions[parsed_idx]
+                yield from self._iter_unchanged(next_idx, position)
+                self._series[position] = data
+                yield position, data
+                next_idx = position + 1
+            yield from self._iter_unchanged(next_idx, len(self.paths))
+        finally:
+            close = getattr(parsed, 'close', None)
+            if close is not None:
+                close()
+
+    def save(self) -> bool:
+        # save the series of every file as the snapshot for the next read, returning False when some positions
+        # haven't been read or the series can't be stored - remote files are left out, as they are always parsed
+        if any(data is None for data in self._series):
+            return False
+        entries: 'collections.OrderedDict[str, typing.Tuple[Signature, SeriesData]]' = collections.OrderedDict()
+        for path, signature, data in zip(self.paths, self._signatures, self._series):
+            if signature is not None and data is not None:
+                entries.setdefault(path, (signature, data))
+        snapshot = SeriesSnapshot.build(list(entries.keys()),
+                                        [signature for signature, _ in entries.values()],
+                                        [data for _, data in entries.values()])
+        return snapshot is not None and self._store.save(self._key, snapshot)
+
+    def _changed_positions(self, start: int) -> typing.List[int]:
+        return [idx for idx in range(start, len(self.paths)) if self._slots[idx] is None]
+
+    def _iter_unchanged(self, start: int, end: int) -> typing.Iterator[typing.Tuple[int, SeriesData]]:
+        for idx in range(start, end):
+            slot = self._slots[idx]
+            if slot is not None and self._snapshot is not None:
+                data = self._snapshot.series(slot)
+                self._series[idx] = data
+                yield idx, data
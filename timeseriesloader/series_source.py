@@ -0,0 +1,226 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+import bz2
+import contextlib
+import functools
+import gzip
+import io
+import lzma
+import os
+import posixpath
+import tarfile
+import threading
+import urllib.parse
+import zipfile
+
+__all__ = ('COMPRESSED_SUFFIXES', 'ARCHIVE_SUFFIXES', 'Prefetched', 'SeriesLocation', 'local_path', 'locate',
+           'open_series')
+
+# compressed series files are found by appending one of these to the referenced name
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.xz', '.zst')
+
+# archives are found by appending one of these to a missing directory of the referenced path
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+# archive handles are opened once per thread and process, as tar files can't be shared between threads, and a
+# handle inherited by a forked worker shares its file offset with the parent
+_handles = threading.local()
+
+# an open zip or tar archive, along with the (mtime_ns, size) version of the file it was opened on
+_ArchiveHandle = typing.Tuple[typing.Tuple[int, int], typing.Union[zipfile.ZipFile, tarfile.TarFile]]
+
+
+def local_path(uri: str) -> typing.Optional[str]:
+    # map a file uri or plain path to a local filesystem path, or None if it refers to remote storage
+    parsed = urllib.parse.urlparse(uri)
+    if parsed.scheme == 'file':
+        return urllib.parse.unquote(parsed.path)
+    if parsed.scheme == '' or len(parsed.scheme) == 1:
+        # plain paths, including windows drive letters
+        return uri
+    return None
+
+
+class Prefetched(str):
+    """
+    A series uri along with the `content` already fetched from it, which open_series reads from memory rather
+    than fetching the file again.  It compares and hashes as the uri itself.
+    """
+
+    content: bytes
+
+    def __new__(cls, uri: str, content: bytes) -> 'Prefetched':
+        prefetched = super().__new__(cls, uri)
+        prefetched.content = content
+        return prefetched
+
+    def __reduce__(self) -> typing.Tuple[type, typing.Tuple[str, bytes]]:
+        return Prefetched, (str(self), self.content)
+
+
+class SeriesLocation:
+    """
+    Where the series file referenced by `uri` is stored - a local file `path`, which may be compressed, or
+    a `member` of the archive at `path`.  `path` is None for files on remote storage, which are read by
+    pandas directly.
+    """
+
+    def __init__(self, uri: str, path: typing.Optional[str], member: typing.Optional[str] = None) -> None:
+        self.uri = uri
+        self.path = path
+        self.member = member
+
+    @property
+    def plain(self) -> bool:
+        # an uncompressed local file that can be read in place
+        return self.path is not None and self.member is None and not self.path.endswith(COMPRESSED_SUFFIXES)
+
+
+def locate(uri: str) -> SeriesLocation:
+    """
+    Finds the series file referenced by `uri`.  When a local file doesn't exist, a compressed copy with one of
+    the COMPRESSED_SUFFIXES is used instead, and failing that a member of an archive that stands in place of
+    one of the file's directories - for example `timeseries/0001.csv` is read from `timeseries.zip`, where
+    the member may be named either `0001.csv` or `timeseries/0001.csv`.
+    """
+    path = local_path(uri)
+    if path is None or os.path.exists(path):
+        return SeriesLocation(uri, path)
+
+    for suffix in COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix):
+            return SeriesLocation(uri, path + suffix)
+
+    # walk up the missing directories, looking for an archive in place of each
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    while not os.path.isdir(directory):
+        for suffix in ARCHIVE_SUFFIXES:
+            archive_path = directory + suffix
+            if os.path.isfile(archive_path):
+                member = _find_member(archive_path, directory, path)
+                if member is not None:
+                    return SeriesLocation(uri, archive_path, member)
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+
+    # missing files are left for the reader to report
+    return SeriesLocation(uri, path)
+
+
+@contextlib.contextmanager
+def open_series(uri: str) -> typing.Iterator[typing.Union[str, typing.IO[bytes]]]:
+    """
+    Opens the series file referenced by `uri` for pandas.read_csv, yielding either a path, which pandas reads
+    and decompresses itself, or a decompressing stream over a zstd compressed file or an archive member.
+    Nothing is extracted to disk.  Prefetched content is read from memory, decompressed by the uri's suffix.
+    """
+    if isinstance(uri, Prefetched):
+        with _decompress(io.BytesIO(uri.content), urllib.parse.urlparse(uri).path) as stream:
+            yield stream
+        return
+
+    location = locate(uri)
+    if location.path is None or (location.member is None and not location.path.endswith('.zst')):
+        yield location.path if location.path is not None else uri
+        return
+
+    with contextlib.ExitStack() as stack:
+        if location.member is not None:
+            stream = stack.enter_context(_open_member(location.path, location.member))
+            name = location.member
+        else:
+            stream = stack.enter_context(open(location.path, 'rb'))
+            name = location.path
+        yield stack.enter_context(_decompress(stream, name))
+
+
+def _decompress(stream: typing.IO[bytes], name: str) -> typing.IO[bytes]:
+    # wrap a stream in a streaming decompressor chosen by the file name
+    if name.endswith('.gz'):
+        # a binary file object, though GzipFile isn't typed as typing.IO
+        return typing.cast(typing.IO[bytes], gzip.GzipFile(fileobj=stream))
+    if name.endswith('.bz2'):
+        return bz2.BZ2File(stream)
+    if name.endswith('.xz'):
+        return lzma.LZMAFile(stream)
+    if name.endswith('.zst'):
+        try:
+            import zstandard  # type: ignore
+        except ImportError:
+            raise ImportError('reading zstd compressed series files requires the zstandard package')
+        return zstandard.ZstdDecompressor().stream_reader(stream)
+    return stream
+
+
+def _find_member(archive_path: str, directory: str, path: str) -> typing.Optional[str]:
+    # the member of an archive standing in for `directory` that holds `path`, possibly compressed
+    stat = os.stat(archive_path)
+    names = _member_names(archive_path, stat.st_mtime_ns, stat.st_size)
+    relative = os.path.relpath(path, directory).replace(os.sep, '/')
+    for name in (relative, posixpath.join(os.path.basename(directory), relative)):
+        for suffix in ('',) + COMPRESSED_SUFFIXES:
+            if name + suffix in names:
+                return name + suffix
+    return None
+
+
+@functools.lru_cache(maxsize=16)
+def _member_names(archive_path: str, mtime_ns: int, size: int) -> typing.FrozenSet[str]:
+    # the file names held by an archive, read once per version of the archive
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            return frozenset(archive.namelist())
+    with tarfile.open(archive_path) as archive:
+        return frozenset(member.name for member in archive.getmembers() if member.isfile())
+
+
+def _open_member(archive_path: str, member: str) -> typing.IO[bytes]:
+    # open a member of an archive as a stream, reusing this thread's handle on the archive while it is unchanged
+    stat = os.stat(archive_path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    archives = _thread_archives()
+    handle = archives.get(archive_path)
+    if handle is not None and handle[0] == version:
+        archive = handle[1]
+    else:
+        if handle is not None:
+            handle[1].close()
+        archive = zipfile.ZipFile(archive_path) if zipfile.is_zipfile(archive_path) else tarfile.open(archive_path)
+        archives[archive_path] = (version, archive)
+
+    if isinstance(archive, zipfile.ZipFile):
+        return archive.open(member)
+    stream = archive.extractfile(member)
+    if stream is None:
+        # only regular files are listed as members, so this is an archive changed since it was listed
+        raise OSError(member + ' in ' + archive_path + ' is not a regular file')
+    return stream
+
+
+def _thread_archives() -> typing.Dict[str, _ArchiveHandle]:
+    # the archive handles of this thread, keyed by path - handles inherited from the parent of a forked process
+    # are closed rather than reused, which leaves the parent's own descriptors untouched
+    if getattr(_handles, 'pid', None) != os.getpid():
+        for _, archive in getattr(_handles, 'archives', {}).values():
+            archive.close()
+        _handles.pid = os.getpid()
+        _handles.archives = {}
+    return _handles.archives
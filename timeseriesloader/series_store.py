@@ -0,0 +1,210 @@
+"""
+   Copyright © 2019 Uncharted Software Inc.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+"""
+
+import typing
+import argparse
+import json
+import os
+
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
+
+from d3m import exceptions
+
+from timeseriesloader import series_source
+
+__all__ = ('SeriesStore', 'pack_directory')
+
+STORE_FILE = 'series_store.bin'
+INDEX_FILE = 'series_store.json'
+
+
+class SeriesStore:
+    """
+    Read only view over a packed series store - a single binary file holding the values, timestamps
+    and per-series offsets of every series in a directory, along with a json index keyed by file name.
+    Sections of the binary file are memory mapped, so series are sliced out without reading or parsing
+    each file.  The index records the modification time of `series_dir` (defaults to `store_dir`) when it was
+    packed, and the store covers nothing once files have been added, removed or replaced in it since.  The size
+    and modification time of each packed file are recorded too, for callers that also check each file for
+    changes made in place, at the cost of a stat per file.
+    """
+
+    def __init__(self, store_dir: str, series_dir: str = None) -> None:
+        with open(os.path.join(store_dir, INDEX_FILE), 'r') as index_file:
+            index = json.load(index_file)
+
+        self.series_dir = series_dir or store_dir
+        self.time_col_index: int = index['time_col_index']
+        self.value_col_index: int = index['value_col_index']
+        self.positions: typing.Dict[str, int] = index['files']
+        # stores packed before these were recorded are treated as stale
+        self.directory_mtime_ns: typing.Optional[int] = index.get('directory_mtime_ns')
+        self.signatures: typing.Dict[str, typing.List[int]] = index.get('signatures', {})
+
+        store_path = os.path.join(store_dir, STORE_FILE)
+        sections = index['sections']
+        self.offsets = self._map(store_path, sections['offsets'])
+        self.times = self._map(store_path, sections['times'])
+        self.values = self._map(store_path, sections['values'])
+
+    @classmethod
+    def open(cls, base_uri: str) -> typing.Optional['SeriesStore']:
+        # open the store packed into a series directory, or return None if it hasn't been packed
+        store_dir = series_source.local_path(base_uri)
+        if store_dir is None or not os.path.exists(os.path.join(store_dir, INDEX_FILE)):
+            return None
+        return cls(store_dir)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def covers(self,
+               file_names: typing.Iterable[str],
+               time_index: int,
+               value_index: int,
+               check_files: bool = False) -> bool:
+        # check that the store was packed from the same columns and holds every requested file, in a series
+        # directory that hasn't changed since - and that each file is unchanged itself when check_files is set
+        if time_index != self.time_col_index or value_index != self.value_col_index or not self._fresh():
+            return False
+        return all(file_name in self.positions and (not check_files or self._unchanged(file_name))
+                   for file_name in file_names)
+
+    def lengths(self, positions: typing.Sequence[int]) -> np.ndarray:
+        position_array = np.asarray(positions, dtype=np.int64)
+        return self.offsets[position_array + 1] - self.offsets[position_array]
+
+    def series(self, position: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+        # views of the times and values of one series - no data is copied
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.times[start:end], self.values[start:end]
+
+    def matrix(self, positions: typing.Sequence[int]) -> typing.Optional[np.ndarray]:
+        """
+        Returns the values of the given series as a (series, timestamps) matrix when they all have the same
+        length.  When the positions are a contiguous run of the store the result is a view of the mapped
+        file, otherwise the rows are gathered into a new array.  Returns None for series of unequal length.
+        """
+        if len(positions) == 0:
+            return None
+        lengths = self.lengths(positions)
+        length = int(lengths[0])
+        if not np.all(lengths == length):
+            return None
+
+        start = int(positions[0])
+        if list(positions) == list(range(start, start + len(positions))):
+            begin = self.offsets[start]
+            return self.values[begin:begin + length * len(positions)].reshape(len(positions), length)
+
+        rows = self.offsets[np.asarray(positions, dtype=np.int64)][:, np.newaxis] + np.arange(length)
+        return self.values[rows]
+
+    def _fresh(self) -> bool:
+        # a single stat of the series directory, whose modification time changes as files are added, removed,
+        # renamed or atomically replaced in it, but not when a file is rewritten in place
+        try:
+            return os.stat(self.series_dir).st_mtime_ns == self.directory_mtime_ns
+        except OSError:
+            return False
+
+    def _unchanged(self, file_name: str) -> bool:
+        # compare the file's current size and modification time with those recorded when it was packed
+        signature = _file_signature(os.path.join(self.series_dir, file_name))
+        return signature is not None and list(signature) == self.signatures.get(file_name)
+
+    @staticmethod
+    def _map(store_path: str, section: typing.Dict[str, typing.Any]) -> np.ndarray:
+        if section['length'] == 0:
+            return np.empty(0, dtype=section['dtype'])
+        return np.memmap(store_path, dtype=section['dtype'], mode='r', offset=section['offset'],
+                         shape=(section['length'],))
+
+
+def _file_signature(path: str) -> typing.Optional[typing.Tuple[int, int]]:
+    # the size and modification time of a series file, or None if it is missing
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def pack_directory(series_dir: str,
+                   time_index: int = 0,
+                   value_index: int = 1,
+                   output_dir: str = None) -> str:
+    """
+    Packs every csv file in `series_dir` into a series store, written to `output_dir` (defaults to
+    `series_dir` itself, where the loader will detect it).  Returns the path of the store's index.  A store
+    written elsewhere is opened with SeriesStore(output_dir, series_dir) to check it against the series files.
+    """
+    output_dir = output_dir or series_dir
+    file_names = sorted(name for name in os.listdir(series_dir) if name.endswith('.csv'))
+
+    all_times = []
+    all_values = []
+    signatures = {}
+    offsets = np.zeros(len(file_names) + 1, dtype=np.int64)
+    for position, file_name in enumerate(file_names):
+        # taken before parsing, so a file rewritten while it is packed is seen as changed
+        signatures[file_name] = _file_signature(os.path.join(series_dir, file_name))
+        series = pd.read_csv(os.path.join(series_dir, file_name))
+        all_times.append(series.iloc[:, time_index].values)
+        all_values.append(series.iloc[:, value_index].values)
+        offsets[position + 1] = offsets[position] + len(series)
+
+    times = np.concatenate(all_times) if all_times else np.empty(0, dtype=np.int64)
+    values = np.concatenate(all_values).astype(np.float64) if all_values else np.empty(0, dtype=np.float64)
+    if times.dtype.hasobject:
+        raise exceptions.InvalidArgumentValueError('time column ' + str(time_index) + ' in ' + series_dir
+                                                   + ' is not numeric and cannot be packed')
+
+    # write the sections back to back, recording where each one starts
+    sections = {}
+    with open(os.path.join(output_dir, STORE_FILE), 'wb') as store_file:
+        for name, array in (('offsets', offsets), ('times', times), ('values', values)):
+            sections[name] = {'offset': store_file.tell(), 'length': len(array), 'dtype': array.dtype.str}
+            store_file.write(np.ascontiguousarray(array).tobytes())
+
+    index_path = os.path.join(output_dir, INDEX_FILE)
+    with open(index_path, 'w') as index_file:
+        # taken once the store's own files exist, as creating them changes the modification time of the directory
+        directory_mtime_ns = os.stat(series_dir).st_mtime_ns
+        json.dump({
+            'time_col_index': time_index,
+            'value_col_index': value_index,
+            'sections': sections,
+            'files': {file_name: position for position, file_name in enumerate(file_names)},
+            'directory_mtime_ns': directory_mtime_ns,
+            'signatures': signatures,
+        }, index_file)
+    return index_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='pack a directory of time series csv files into a series store')
+    parser.add_argument('series_dir', help='directory containing the time series csv files')
+    parser.add_argument('--time-col-index', type=int, default=0)
+    parser.add_argument('--value-col-index', type=int, default=1)
+    parser.add_argument('--output-dir', default=None, help='defaults to the series directory')
+    args = parser.parse_args()
+    print(pack_directory(args.series_dir, args.time_col_index, args.value_col_index, args.output_dir))
+
+
+if __name__ == '__main__':
+    main()
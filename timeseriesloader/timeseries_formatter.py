@@ -15,6 +15,7 @@
 """
 
 import typing
+import functools
 import os
 import csv
 import collections
@@ -22,12 +23,18 @@ import collections
 import frozendict  # type: ignore
 import pandas as pd  # type: ignore
 
-from d3m import container, exceptions, utils as d3m_utils
+from d3m import container, exceptions
 from d3m.metadata import base as metadata_base, hyperparams
 from d3m.primitive_interfaces import base, transformer
 
+from timeseriesloader import (deadline, downsample, long_form, output_metadata, package_info, profiling, series_cache,
+                              series_reader, series_snapshot, series_source)
+
 __all__ = ('TimeSeriesFormatterPrimitive',)
 
+# resource id of the per series resource written by the side_resource layout
+_SERIES_RESOURCE_ID = '1'
+
 
 class Hyperparams(hyperparams.Hyperparams):
     file_col_index = hyperparams.Hyperparameter[typing.Union[int, None]](
@@ -41,6 +48,102 @@ class Hyperparams(hyperparams.Hyperparams):
         semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
         description='Index of data resource in input dataset containing the reference to timeseries data.'
     )
+    workers = hyperparams.Bounded[int](
+        lower=1,
+        upper=None,
+        default=1,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Number of series files to read concurrently'
+    )
+    parallel_backend = hyperparams.Enumeration[str](
+        values=['thread', 'process', 'async'],
+        default='thread',
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Pool used to read series files when workers is greater than 1.  async fetches up to ' +
+                    'workers files at a time on an event loop, ahead of parsing them, reusing connections to ' +
+                    'http(s) servers - for series on high latency storage'
+    )
+    cache_dir = hyperparams.Hyperparameter[typing.Union[str, None]](
+        default=None,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Directory used to cache parsed series files across runs. ' +
+                    'If set to None, caching is disabled.'
+    )
+    cache_max_bytes = hyperparams.Bounded[int](
+        lower=0,
+        upper=None,
+        default=1024 * 1024 * 1024,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Maximum size of the series cache, after which the least recently used entries are evicted'
+    )
+    incremental_dir = hyperparams.Hyperparameter[typing.Union[str, None]](
+        default=None,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Directory holding a manifest of the series files read by the last call to produce, along ' +
+                    'with the series parsed from them, so that the next call only parses new and changed files. ' +
+                    'If set to None, every file is parsed on each call.'
+    )
+    chunk_size = hyperparams.Bounded[int](
+        lower=1,
+        upper=None,
+        default=1000,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Number of series included in each chunk of long form data returned by iter_chunks'
+    )
+    time_col_index = hyperparams.Hyperparameter[int](
+        default=0,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Index of column in loaded time series files containing the times, used by time_start, ' +
+                    'time_end and stride'
+    )
+    time_start = hyperparams.Hyperparameter[typing.Union[float, None]](
+        default=None,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Rows with times earlier than this are dropped as each series file is parsed. ' +
+                    'If set to None, series start from their first row.'
+    )
+    time_end = hyperparams.Hyperparameter[typing.Union[float, None]](
+        default=None,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Rows with times at or after this are dropped, and parsing of a series file stops at the ' +
+                    'first such row, as series files are expected in time order.  If set to None, series run ' +
+                    'to their last row.'
+    )
+    stride = hyperparams.Bounded[int](
+        lower=1,
+        upper=None,
+        default=1,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Number of consecutive rows of each series reduced to a single row as the file is parsed'
+    )
+    aggregation = hyperparams.Enumeration[str](
+        values=list(downsample.AGGREGATIONS),
+        default='first',
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='How each group of stride rows is reduced.  first keeps the first row of the group, and ' +
+                    'the others reduce the numeric columns, keeping the time and other columns of the first row'
+    )
+    broadcast_layout = hyperparams.Enumeration[str](
+        values=list(long_form.LAYOUTS),
+        default='dense',
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='How main resource columns are stored in the long form output.  dense copies them onto ' +
+                    'every timestep row, categorical stores string columns as categoricals so each row only ' +
+                    'holds a small code, and side_resource leaves them out of the long form resource and ' +
+                    'writes them once per series to a second resource, referenced by the series_id column'
+    )
+    generate_metadata = hyperparams.Hyperparameter[bool](
+        default=False,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Generate the output metadata by inspecting the output values, rather than building it ' +
+                    'directly from the input metadata and the known column types.  Much slower on large outputs'
+    )
+    profile = hyperparams.Hyperparameter[bool](
+        default=False,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Record per-stage timings and file read statistics, available through get_profile and ' +
+                    'passed to any hooks registered with timeseriesloader.profiling.add_hook'
+    )
 
 
 class TimeSeriesFormatterPrimitive(transformer.TransformerPrimitiveBase[container.Dataset,
@@ -76,7 +179,7 @@ class TimeSeriesFormatterPrimitive(transformer.TransformerPrimitiveBase[containe
                 'type': metadata_base.PrimitiveInstallationType.PIP,
                 'package_uri': 'git+https://gitlab.com/uncharted-distil/distil-timeseries-loader.git@' +
                                '{git_commit}#egg=DistilTimeSeriesLoader-0.2.0'
-                               .format(git_commit=d3m_utils.current_git_commit(os.path.dirname(__file__)),),
+                               .format(git_commit=package_info.git_commit()),
             }],
             'algorithm_types': [
                 metadata_base.PrimitiveAlgorithmType.FILE_MANIPULATION,
@@ -86,6 +189,47 @@ class TimeSeriesFormatterPrimitive(transformer.TransformerPrimitiveBase[containe
         }
     )
 
+    def __init__(self, *, hyperparams: Hyperparams) -> None:
+        super().__init__(hyperparams=hyperparams)
+
+        self._read_stats = series_reader.ReadStats()
+        self._profile = profiling.NULL_PROFILE
+        self._last_profile: typing.Dict[str, typing.Any] = {}
+        self._pending: typing.Optional[_PendingFormat] = None
+        self._snapshots: typing.Optional[series_snapshot.SnapshotStore] = None
+        if self.hyperparams['incremental_dir'] is not None:
+            self._snapshots = series_snapshot.SnapshotStore(self.hyperparams['incremental_dir'])
+        self._series_cache: typing.Optional[series_cache.SeriesCache] = None
+        if self.hyperparams['cache_dir'] is not None:
+            self._series_cache = series_cache.SeriesCache(self.hyperparams['cache_dir'],
+                                                          self.hyperparams['cache_max_bytes'])
+
+    def get_cache_stats(self) -> typing.Dict[str, int]:
+        """
+        Returns the hit, miss and eviction counts of the series cache for this primitive instance,
+        along with the number of entries and bytes it currently holds.
+        """
+        if self._series_cache is None:
+            return {}
+        return self._series_cache.stats()
+
+    def get_read_stats(self) -> typing.Dict[str, int]:
+        """
+        Returns the number of series files requested by the last call, how many distinct files were
+        read, how many reads were saved by files referenced from more than one row, and how many series
+        were reused from the last call when reading incrementally.
+        """
+        return self._read_stats.as_dict()
+
+    def get_profile(self) -> typing.Dict[str, typing.Any]:
+        """
+        Returns the profile of the last call when the profile hyperparameter is set: wall time per stage
+        (discovery, load, long_form and metadata), the number of files and bytes read, the total time spent
+        reading and parsing files, and the slowest files.  For iter_chunks the stages are summed over all
+        chunks, and the profile is complete once the last chunk has been generated.
+        """
+        return self._last_profile
+
     @classmethod
     def _find_csv_file_column(cls, inputs_metadata: metadata_base.DataMetadata, res_id: int) -> typing.Optional[int]:
         indices = inputs_metadata.list_columns_with_semantic_types(cls._semantic_types, at=(res_id,))
@@ -131,44 +275,203 @@ class TimeSeriesFormatterPrimitive(transformer.TransformerPrimitiveBase[containe
                 inputs: container.Dataset,
                 timeout: float = None,
                 iterations: int = None) -> base.CallResult[container.Dataset]:
-
-        main_resource_index = self.hyperparams['main_resource_index']
-        if main_resource_index is None:
-            raise exceptions.InvalidArgumentValueError('no main resource specified')
-
-        file_index = self.hyperparams['file_col_index']
-        if file_index is not None:
-            if not self._is_csv_file_column(inputs.metadata, main_resource_index, file_index):
-                raise exceptions.InvalidArgumentValueError('column idx=' + str(file_index) + ' from does not contain csv file names')
-        else:
-            file_index = self._find_csv_file_column(inputs.metadata)
-            if file_index is None:
-                raise exceptions.InvalidArgumentValueError('no column from contains csv file names')
-
-        # generate the long form timeseries data
-        base_path = self._get_base_path(inputs.metadata, main_resource_index, file_index)
-        output_data = []
-        timeseries_dataframe = pd.DataFrame()
-        for idx, tRow in inputs[main_resource_index].iterrows():
-            # read the timeseries data
-            csv_path = os.path.join(base_path, tRow[file_index])
-            timeseries_row = pd.read_csv(csv_path)
-
-            # add the timeseries id
-            tRow = tRow.append(pd.Series({'series_id': int(idx)}))
-
-            # combine the timeseries data with the value row
-            output_data.extend([pd.concat([tRow, vRow]) for vIdx, vRow in timeseries_row.iterrows()])
-
-        # add the timeseries index
-        timeseries_dataframe = timeseries_dataframe.append(output_data, ignore_index=True)
-
-        # join the metadata from the 2 data resources
-        timeseries_dataframe = container.DataFrame(timeseries_dataframe)
+        """
+        Formats the series referenced by the inputs, one iteration per series.  When the timeout or the number
+        of iterations is reached first, the long form rows of the series read so far are returned with
+        has_finished set to False, and calling produce again with the same inputs resumes from the cursor
+        returned by get_cursor, returning every row read so far.
+        """
+        self._start_call()
+        pending = self._pending
+        if pending is None or pending.inputs is not inputs:
+            pending = _PendingFormat(inputs, *self._get_series_paths(inputs))
+            if self._snapshots is not None:
+                pending.incremental = self._snapshots.open(pending.base_path, self._cache_spec(), pending.csv_paths)
+        main_resource_index = pending.main_resource_index
+
+        # read each of the timeseries files, saving them for the next call once all have been read
+        with self._profile.stage('load'):
+            progress = deadline.Deadline(timeout, iterations)
+            for _, frame in progress.take(self._read_series(pending.csv_paths, pending.position,
+                                                            pending.incremental)):
+                pending.frames.append(frame)
+                pending.position += 1
+            has_finished = pending.position == len(pending.csv_paths)
+            if has_finished and pending.incremental is not None:
+                pending.incremental.save()
+        self._pending = None if has_finished else pending
+
+        # generate the long form timeseries data, along with the series resource for the side_resource layout
+        layout = self.hyperparams['broadcast_layout']
+        with self._profile.stage('long_form'):
+            main_resource = pending.main_resource.iloc[:pending.position]
+            resources = {'0': container.DataFrame(long_form.build_long_form(main_resource, pending.frames, layout),
+                                                  generate_metadata=False)}
+            if layout == 'side_resource':
+                resources[_SERIES_RESOURCE_ID] = container.DataFrame(long_form.build_series_resource(main_resource),
+                                                                     generate_metadata=False)
 
         # wrap as a D3M container
-        #return base.CallResult(container.Dataset({'0': timeseries_dataframe}, metadata))
-        return base.CallResult(container.Dataset({'0': timeseries_dataframe}, generate_metadata=True))
+        with self._profile.stage('metadata'):
+            if self.hyperparams['generate_metadata']:
+                outputs = container.Dataset(resources, generate_metadata=True)
+            else:
+                metadata = output_metadata.dataset_metadata(self._get_resources_metadata(
+                    inputs.metadata, main_resource_index, main_resource.shape[1], resources))
+                outputs = container.Dataset(resources, metadata)
+
+        self._last_profile = self._profile.finish(type(self).__name__)
+        return base.CallResult(outputs, has_finished=has_finished, iterations_done=progress.iterations_done)
+
+    def get_cursor(self) -> typing.Optional[int]:
+        """
+        Returns the position of the next series to read when the last call to produce stopped before reading
+        every series, or None when there is no partial call to resume.
+        """
+        if self._pending is None:
+            return None
+        return self._pending.position
+
+    def iter_chunks(self, *, inputs: container.Dataset) -> typing.Iterator[container.DataFrame]:
+        """
+        Generates the same long form data as produce, as a sequence of dataframes that each hold the rows of
+        at most chunk_size series.  Only one chunk of series is held in memory at a time, so peak memory
+        is bounded by the chunk size rather than the size of the dataset.  Row indices continue from one
+        chunk to the next.  With the side_resource layout the chunks hold the narrow long form rows, and
+        series_id refers to the rows of the main resource.
+        """
+        self._start_call()
+        main_resource_index, main_resource, csv_paths, _ = self._get_series_paths(inputs)
+        chunk_size = self.hyperparams['chunk_size']
+
+        row_offset = 0
+        for start in range(0, len(csv_paths), chunk_size):
+            end = min(start + chunk_size, len(csv_paths))
+            with self._profile.stage('load'):
+                series_frames = [frame for _, frame in self._read_series(csv_paths[start:end])]
+
+            with self._profile.stage('long_form'):
+                chunk = long_form.build_long_form(main_resource.iloc[start:end], series_frames,
+                                                  self.hyperparams['broadcast_layout'])
+                chunk.index = pd.RangeIndex(row_offset, row_offset + len(chunk))
+                row_offset += len(chunk)
+
+            with self._profile.stage('metadata'):
+                chunk = container.DataFrame(chunk, generate_metadata=self.hyperparams['generate_metadata'])
+                if not self.hyperparams['generate_metadata']:
+                    columns_metadata = self._get_columns_metadata(inputs.metadata, main_resource_index,
+                                                                  self._n_broadcast_columns(main_resource), chunk)
+                    chunk.metadata = output_metadata.dataframe_metadata(chunk.shape[0], columns_metadata)
+            yield chunk
+
+        self._last_profile = self._profile.finish(type(self).__name__)
+
+    def _start_call(self) -> None:
+        # reset the statistics gathered for the last call
+        self._read_stats = series_reader.ReadStats()
+        self._profile = profiling.ProduceProfile() if self.hyperparams['profile'] else profiling.NULL_PROFILE
+
+    def _get_series_paths(self,
+                          inputs: container.Dataset) -> typing.Tuple[str, pd.DataFrame, typing.List[str], str]:
+        # find the main resource, the paths of the series files it references and their base uri
+        with self._profile.stage('discovery'):
+            main_resource_index = self.hyperparams['main_resource_index']
+            if main_resource_index is None:
+                raise exceptions.InvalidArgumentValueError('no main resource specified')
+
+            file_index = self.hyperparams['file_col_index']
+            if file_index is not None:
+                if not self._is_csv_file_column(inputs.metadata, main_resource_index, file_index):
+                    raise exceptions.InvalidArgumentValueError('column idx=' + str(file_index)
+                                                               + ' from does not contain csv file names')
+            else:
+                file_index = self._find_csv_file_column(inputs.metadata, main_resource_index)
+                if file_index is None:
+                    raise exceptions.InvalidArgumentValueError('no column from contains csv file names')
+
+            base_path = self._get_base_path(inputs.metadata, main_resource_index, file_index)
+            main_resource = pd.DataFrame(inputs[main_resource_index])
+            csv_paths = [os.path.join(base_path, file_path) for file_path in main_resource.iloc[:, file_index]]
+
+        return main_resource_index, main_resource, csv_paths, base_path
+
+    def _get_columns_metadata(self,
+                              inputs_metadata: metadata_base.DataMetadata,
+                              main_resource_index: str,
+                              n_main_columns: int,
+                              timeseries_dataframe: pd.DataFrame) -> output_metadata.ColumnsMetadata:
+        # main resource columns keep their metadata, and the series id and series file columns are described
+        # by their types
+        columns_metadata = [output_metadata.copy_column_metadata(inputs_metadata, column_index,
+                                                                 at=(main_resource_index,))
+                            for column_index in range(n_main_columns)]
+        columns_metadata.extend(output_metadata.dtype_column_metadata(timeseries_dataframe.columns[column_index],
+                                                                      timeseries_dataframe.dtypes.iloc[column_index])
+                                for column_index in range(n_main_columns, timeseries_dataframe.shape[1]))
+        return columns_metadata
+
+    def _get_resources_metadata(self,
+                                inputs_metadata: metadata_base.DataMetadata,
+                                main_resource_index: str,
+                                n_main_columns: int,
+                                resources: typing.Mapping[str, pd.DataFrame]) \
+            -> typing.Dict[str, typing.Tuple[int, output_metadata.ColumnsMetadata]]:
+        # join the metadata from the 2 data resources - with the side_resource layout the main resource columns
+        # describe the series resource instead, and the long form series_id column refers to it
+        timeseries_dataframe = resources['0']
+        if _SERIES_RESOURCE_ID not in resources:
+            columns_metadata = self._get_columns_metadata(inputs_metadata, main_resource_index, n_main_columns,
+                                                          timeseries_dataframe)
+            return {'0': (timeseries_dataframe.shape[0], columns_metadata)}
+
+        series_resource = resources[_SERIES_RESOURCE_ID]
+        series_metadata = self._get_columns_metadata(inputs_metadata, main_resource_index, n_main_columns,
+                                                     series_resource)
+        columns_metadata = self._get_columns_metadata(inputs_metadata, main_resource_index, 0, timeseries_dataframe)
+        columns_metadata[0]['foreign_key'] = {
+            'type': 'COLUMN',
+            'resource_id': _SERIES_RESOURCE_ID,
+            'column_index': n_main_columns,
+        }
+        return {
+            '0': (timeseries_dataframe.shape[0], columns_metadata),
+            _SERIES_RESOURCE_ID: (series_resource.shape[0], series_metadata),
+        }
+
+    def _n_broadcast_columns(self, main_resource: pd.DataFrame) -> int:
+        # the number of main resource columns copied onto each long form row
+        return 0 if self.hyperparams['broadcast_layout'] == 'side_resource' else main_resource.shape[1]
+
+    def _read_series(self,
+                     csv_paths: typing.Sequence[str],
+                     start: int = 0,
+                     incremental: typing.Optional[series_snapshot.IncrementalRead] = None) \
+            -> typing.Iterator[typing.Tuple[int, pd.DataFrame]]:
+        # parse each series file from the start position onwards, applying the time range and downsampling as it
+        # is parsed - with an incremental read, series unchanged since the last call are taken from its snapshot
+        paths = csv_paths[start:]
+        if incremental is not None:
+            self._read_stats.reused += incremental.n_unchanged(start)
+            paths = incremental.changed_paths(start)
+
+        read_fn = functools.partial(_read_frame, time_index=self.hyperparams['time_col_index'], window=self._window())
+        series = series_reader.iter_read(paths, read_fn, self.hyperparams['workers'],
+                                         self.hyperparams['parallel_backend'], self._series_cache, self._cache_spec(),
+                                         self._read_stats, self._profile)
+        if incremental is not None:
+            return incremental.merge(series, start)
+        if start == 0:
+            return series
+        return ((idx + start, frame) for idx, frame in series)
+
+    def _window(self) -> downsample.SeriesWindow:
+        # the time range and downsampling applied to each series as it is parsed
+        return downsample.SeriesWindow(self.hyperparams['time_start'], self.hyperparams['time_end'],
+                                       self.hyperparams['stride'], self.hyperparams['aggregation'])
+
+    def _cache_spec(self) -> str:
+        # describes the parsed frames for the series cache and incremental snapshots
+        return 'frame' + self._window().spec()
 
     def _get_base_path(self,
                    inputs_metadata: metadata_base.DataMetadata,
@@ -191,3 +494,27 @@ class TimeSeriesFormatterPrimitive(transformer.TransformerPrimitiveBase[containe
         ref_res_id = column_metadata['foreign_key']['resource_id']
 
         return ref_res_id
+
+
+class _PendingFormat:
+    # the progress of formatting across produce calls, which is resumed while the same inputs are passed in
+    def __init__(self,
+                 inputs: container.Dataset,
+                 main_resource_index: str,
+                 main_resource: pd.DataFrame,
+                 csv_paths: typing.List[str],
+                 base_path: str) -> None:
+        self.inputs = inputs
+        self.main_resource_index = main_resource_index
+        self.main_resource = main_resource
+        self.csv_paths = csv_paths
+        self.base_path = base_path
+        self.position = 0
+        self.frames: typing.List[pd.DataFrame] = []
+        self.incremental: typing.Optional[series_snapshot.IncrementalRead] = None
+
+
+def _read_frame(csv_path: str, time_index: int, window: downsample.SeriesWindow) -> pd.DataFrame:
+    # parse every column of a series file, which may be compressed or held in an archive
+    with series_source.open_series(csv_path) as source:
+        return window.read_csv(source, time_index)
@@ -18,17 +18,24 @@ import typing
 import os
 import csv
 import collections
+import functools
 
 import frozendict  # type: ignore
+import numpy as np  # type: ignore
 import pandas as pd  # type: ignore
 
-from d3m import container, exceptions, utils as d3m_utils
+from d3m import container, exceptions
 from d3m.metadata import base as metadata_base, hyperparams
 from d3m.primitive_interfaces import base, transformer
-from common_primitives import utils
+
+from timeseriesloader import (deadline, downsample, output_metadata, package_info, profiling, ragged, series_cache,
+                              series_reader, series_snapshot, series_source, series_store)
 
 __all__ = ('TimeSeriesLoaderPrimitive',)
 
+# (position, (times, values)) tuples for each series file
+SeriesIterator = typing.Iterator[typing.Tuple[int, typing.Tuple[np.ndarray, np.ndarray]]]
+
 
 class Hyperparams(hyperparams.Hyperparams):
     file_col_index = hyperparams.Hyperparameter[typing.Union[int, None]](
@@ -47,6 +54,119 @@ class Hyperparams(hyperparams.Hyperparams):
         semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
         description='Index of column in loaded time series files containing the values'
     )
+    value_col_indices = hyperparams.List(
+        elements=hyperparams.Hyperparameter[int](-1),
+        default=(),
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Indices of the value columns loaded as channels by load_tensor and load_channels, with a ' +
+                    'single read of each series file.  Channels are in the order listed.  If empty, ' +
+                    'value_col_index is loaded as the only channel.'
+    )
+    dtype = hyperparams.Enumeration[str](
+        values=['float64', 'float32'],
+        default='float64',
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Data type of the values in the output dataframe'
+    )
+    alignment = hyperparams.Enumeration[str](
+        values=['first', 'union'],
+        default='first',
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Use the timestamps of the first series file as the columns, or align series of ' +
+                    'differing lengths on the union of all timestamps'
+    )
+    parse_times = hyperparams.Enumeration[str](
+        values=['all', 'first'],
+        default='all',
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Parse the time column of every series file, or only of the first file and check the ' +
+                    'others against it by fingerprint (row count, first and last timestamp).  Only applies ' +
+                    'when alignment is \'first\', series are not windowed or downsampled, and series are not ' +
+                    'loaded incrementally'
+    )
+    workers = hyperparams.Bounded[int](
+        lower=1,
+        upper=None,
+        default=1,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Number of series files to read concurrently'
+    )
+    parallel_backend = hyperparams.Enumeration[str](
+        values=['thread', 'process', 'async'],
+        default='thread',
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Pool used to read series files when workers is greater than 1.  async fetches up to ' +
+                    'workers files at a time on an event loop, ahead of parsing them, reusing connections to ' +
+                    'http(s) servers - for series on high latency storage'
+    )
+    cache_dir = hyperparams.Hyperparameter[typing.Union[str, None]](
+        default=None,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Directory used to cache parsed series files across runs. ' +
+                    'If set to None, caching is disabled.'
+    )
+    cache_max_bytes = hyperparams.Bounded[int](
+        lower=0,
+        upper=None,
+        default=1024 * 1024 * 1024,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Maximum size of the series cache, after which the least recently used entries are evicted'
+    )
+    store_check = hyperparams.Enumeration[str](
+        values=['directory', 'files'],
+        default='directory',
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='How a packed series store is checked before it is used in place of the series files - ' +
+                    'directory compares the modification time of the series directory, which changes as files ' +
+                    'are added, removed or replaced, while files also compares the size and modification time ' +
+                    'of each requested file, catching files rewritten in place at the cost of a stat per file'
+    )
+    incremental_dir = hyperparams.Hyperparameter[typing.Union[str, None]](
+        default=None,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Directory holding a manifest of the series files loaded by the last call, along with the ' +
+                    'series parsed from them, so that the next call only parses new and changed files. ' +
+                    'If set to None, every file is parsed on each call.'
+    )
+    time_start = hyperparams.Hyperparameter[typing.Union[float, None]](
+        default=None,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Rows with times earlier than this are dropped as each series file is parsed. ' +
+                    'If set to None, series start from their first row.'
+    )
+    time_end = hyperparams.Hyperparameter[typing.Union[float, None]](
+        default=None,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Rows with times at or after this are dropped, and parsing of a series file stops at the ' +
+                    'first such row, as series files are expected in time order.  If set to None, series run ' +
+                    'to their last row.'
+    )
+    stride = hyperparams.Bounded[int](
+        lower=1,
+        upper=None,
+        default=1,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Number of consecutive rows of each series reduced to a single row as the file is parsed'
+    )
+    aggregation = hyperparams.Enumeration[str](
+        values=list(downsample.AGGREGATIONS),
+        default='first',
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='How each group of stride rows is reduced.  first keeps the first row of the group, and ' +
+                    'the others reduce the values, keeping the time of the first row of the group'
+    )
+    generate_metadata = hyperparams.Hyperparameter[bool](
+        default=False,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Generate the output metadata by inspecting the output values, rather than building it ' +
+                    'directly from the input metadata and the known column types.  Much slower on large outputs'
+    )
+    profile = hyperparams.Hyperparameter[bool](
+        default=False,
+        semantic_types=['https://metadata.datadrivendiscovery.org/types/ControlParameter'],
+        description='Record per-stage timings and file read statistics, available through get_profile and ' +
+                    'passed to any hooks registered with timeseriesloader.profiling.add_hook'
+    )
 
 
 class TimeSeriesLoaderPrimitive(transformer.TransformerPrimitiveBase[container.DataFrame,
@@ -55,7 +175,9 @@ class TimeSeriesLoaderPrimitive(transformer.TransformerPrimitiveBase[container.D
     """
     Reads the time series files from a given column in an input dataframe into a new M x N dataframe,
     where each timeseries occupies one of M rows, and each of the row's N entries represents a timestamp.
-    The loading process assumes that each series file has an identical set of timestamps.
+    By default the loading process assumes that each series file has an identical set of timestamps -
+    series with irregular timestamps can be aligned on their union by setting alignment to 'union', or
+    loaded without alignment using load_ragged.
     """
 
     _semantic_types = ('https://metadata.datadrivendiscovery.org/types/FileName',
@@ -79,7 +201,7 @@ class TimeSeriesLoaderPrimitive(transformer.TransformerPrimitiveBase[container.D
                 'type': metadata_base.PrimitiveInstallationType.PIP,
                 'package_uri': 'git+https://gitlab.com/uncharted-distil/distil-timeseries-loader.git@' +
                                '{git_commit}#egg=DistilTimeSeriesLoader-0.2.0'
-                               .format(git_commit=d3m_utils.current_git_commit(os.path.dirname(__file__)),),
+                               .format(git_commit=package_info.git_commit()),
             }],
             'algorithm_types': [
                 metadata_base.PrimitiveAlgorithmType.FILE_MANIPULATION,
@@ -89,9 +211,50 @@ class TimeSeriesLoaderPrimitive(transformer.TransformerPrimitiveBase[container.D
         }
     )
 
+    def __init__(self, *, hyperparams: Hyperparams) -> None:
+        super().__init__(hyperparams=hyperparams)
+
+        self._read_stats = series_reader.ReadStats()
+        self._profile = profiling.NULL_PROFILE
+        self._last_profile: typing.Dict[str, typing.Any] = {}
+        self._pending: typing.Optional[_PendingLoad] = None
+        self._incremental: typing.Optional[series_snapshot.IncrementalRead] = None
+        self._snapshots: typing.Optional[series_snapshot.SnapshotStore] = None
+        if self.hyperparams['incremental_dir'] is not None:
+            self._snapshots = series_snapshot.SnapshotStore(self.hyperparams['incremental_dir'])
+        self._series_cache: typing.Optional[series_cache.SeriesCache] = None
+        if self.hyperparams['cache_dir'] is not None:
+            self._series_cache = series_cache.SeriesCache(self.hyperparams['cache_dir'],
+                                                          self.hyperparams['cache_max_bytes'])
+
+    def get_cache_stats(self) -> typing.Dict[str, int]:
+        """
+        Returns the hit, miss and eviction counts of the series cache for this primitive instance,
+        along with the number of entries and bytes it currently holds.
+        """
+        if self._series_cache is None:
+            return {}
+        return self._series_cache.stats()
+
+    def get_read_stats(self) -> typing.Dict[str, int]:
+        """
+        Returns the number of series files requested by the last call, how many distinct files were
+        read, how many reads were saved by files referenced from more than one row, and how many series
+        were reused from the last call when loading incrementally.
+        """
+        return self._read_stats.as_dict()
+
+    def get_profile(self) -> typing.Dict[str, typing.Any]:
+        """
+        Returns the profile of the last call when the profile hyperparameter is set: wall time per stage
+        (discovery, load, dataframe and metadata), the number of files and bytes read, the total time spent
+        reading and parsing files, and the slowest files.
+        """
+        return self._last_profile
+
     @classmethod
     def _find_csv_file_column(cls, inputs_metadata: metadata_base.DataMetadata) -> typing.Optional[int]:
-        indices = utils.list_columns_with_semantic_types(inputs_metadata, cls._semantic_types)
+        indices = inputs_metadata.list_columns_with_semantic_types(cls._semantic_types)
         for i in indices:
             if cls._is_csv_file_column(inputs_metadata, i):
                 return i
@@ -114,35 +277,391 @@ class TimeSeriesLoaderPrimitive(transformer.TransformerPrimitiveBase[container.D
                 inputs: container.DataFrame,
                 timeout: float = None,
                 iterations: int = None) -> base.CallResult[container.DataFrame]:
+        """
+        Loads the series referenced by the inputs, one iteration per series.  When the timeout or the number of
+        iterations is reached first, the rows of the series loaded so far are returned with has_finished set to
+        False, and calling produce again with the same inputs resumes from the cursor returned by get_cursor,
+        returning every row loaded so far.
+        """
+        self._start_call()
+        pending = self._pending
+        if pending is None or pending.inputs is not inputs:
+            base_path, file_names = self._get_file_names(inputs)
+            pending = _PendingLoad(inputs, base_path, file_names)
+
+        with self._profile.stage('load'):
+            progress = deadline.Deadline(timeout, iterations)
+            timestamps, timeseries_matrix = self._load_matrix(pending, progress)
+            has_finished = pending.position == len(pending.file_names)
+            if has_finished:
+                self._save_incremental()
+        self._pending = None if has_finished else pending
 
-        file_index = self.hyperparams['file_col_index']
-        if file_index is not None:
-            if not self._is_csv_file_column(inputs.metadata, file_index):
-                raise exceptions.InvalidArgumentValueError('column idx=' + str(file_index) + ' from '
-                                                           + str(inputs.columns) + ' does not contain csv file names')
-        else:
-            file_index = self._find_csv_file_column(inputs.metadata)
-            if file_index is None:
-                raise exceptions.InvalidArgumentValueError('no column from '
-                                                           + str(inputs.columns) + ' contains csv file names')
+        # build the dataframe once, using a range of ints as the index
+        with self._profile.stage('dataframe'):
+            timeseries_dataframe = pd.DataFrame(timeseries_matrix, columns=timestamps)
 
+        with self._profile.stage('metadata'):
+            timeseries_dataframe = self._wrap_output(timeseries_dataframe)
+
+        self._last_profile = self._profile.finish(type(self).__name__)
+        return base.CallResult(timeseries_dataframe, has_finished=has_finished,
+                               iterations_done=progress.iterations_done)
+
+    def get_cursor(self) -> typing.Optional[int]:
+        """
+        Returns the position of the next series to load when the last call to produce stopped before loading
+        every series, or None when there is no partial load to resume.
+        """
+        if self._pending is None:
+            return None
+        return self._pending.position
+
+    def load_ragged(self, *, inputs: container.DataFrame) -> ragged.RaggedSeries:
+        """
+        Loads the series referenced by the input dataframe without aligning them, keeping each series'
+        own timestamps.  The result can be aligned on the union of all timestamps with its to_dense method.
+        """
+        self._start_call()
+        base_path, file_names = self._get_file_names(inputs)
+        with self._profile.stage('load'):
+            ragged_series = self._load_ragged(base_path, file_names)
+            self._save_incremental()
+
+        self._last_profile = self._profile.finish(type(self).__name__)
+        return ragged_series
+
+    def load_tensor(self, *, inputs: container.DataFrame) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Loads every value column listed in value_col_indices from a single read of each series file, returning
+        the timestamps and a (series, timestamps, channels) array.  Channels are in the order of
+        value_col_indices.  Series are aligned as in produce - on the timestamps of the first series file with
+        shorter series padded with NaN, or on the union of all timestamps when alignment is 'union'.
+        """
+        self._start_call()
+        base_path, file_names = self._get_file_names(inputs)
+        value_indices = list(self.hyperparams['value_col_indices']) or [self.hyperparams['value_col_index']]
+        dtype = self.hyperparams['dtype']
+
+        timestamps: typing.Optional[np.ndarray] = None
+        tensor: typing.Optional[np.ndarray] = None
+        with self._profile.stage('load'):
+            series = self._iter_channels(base_path, file_names, value_indices)
+            if self.hyperparams['alignment'] == 'union':
+                # every channel of a series shares its timestamps, so the channels are aligned together
+                timestamps, tensor = ragged.RaggedSeries.from_series(series, len(file_names), dtype).to_dense()
+            else:
+                pending = _PendingLoad(inputs, base_path, file_names)
+                self._assemble(series, pending)
+                timestamps, tensor = pending.timestamps, pending.matrix
+            self._save_incremental()
+
+        self._last_profile = self._profile.finish(type(self).__name__)
+        if timestamps is None or tensor is None or len(file_names) == 0:
+            return np.empty(0), np.empty((0, 0, len(value_indices)), dtype=dtype)
+        return timestamps, tensor.astype(dtype, copy=False)
+
+    def load_channels(self, *, inputs: container.DataFrame) -> typing.List[container.DataFrame]:
+        """
+        Loads the channels of load_tensor as one dataframe per channel, laid out as in produce with a row per
+        series and a column per timestamp.  Every frame shares the same time axis.
+        """
+        timestamps, tensor = self.load_tensor(inputs=inputs)
+        columns = pd.Index(timestamps)
+        return [self._wrap_output(pd.DataFrame(tensor[:, :, channel], columns=columns))
+                for channel in range(tensor.shape[2])]
+
+    def _start_call(self) -> None:
+        # reset the statistics gathered for the last call
+        self._read_stats = series_reader.ReadStats()
+        self._profile = profiling.ProduceProfile() if self.hyperparams['profile'] else profiling.NULL_PROFILE
+
+    def _get_file_names(self, inputs: container.DataFrame) -> typing.Tuple[str, typing.List[str]]:
+        # find the base uri and the names of the series files referenced by the inputs
+        with self._profile.stage('discovery'):
+            file_index = self.hyperparams['file_col_index']
+            if file_index is not None:
+                if not self._is_csv_file_column(inputs.metadata, file_index):
+                    raise exceptions.InvalidArgumentValueError('column idx=' + str(file_index) + ' from '
+                                                               + str(inputs.columns)
+                                                               + ' does not contain csv file names')
+            else:
+                file_index = self._find_csv_file_column(inputs.metadata)
+                if file_index is None:
+                    raise exceptions.InvalidArgumentValueError('no column from '
+                                                               + str(inputs.columns) + ' contains csv file names')
+
+            base_path = inputs.metadata.query((metadata_base.ALL_ELEMENTS, file_index))['location_base_uris'][0]
+            return base_path, list(inputs.iloc[:, file_index])
+
+    def _load_matrix(self,
+                     pending: '_PendingLoad',
+                     progress: deadline.Deadline) -> typing.Tuple[np.ndarray, np.ndarray]:
+        # continue loading the series as a (series, timestamps) matrix until the deadline is reached, returning
+        # the timestamps and the rows loaded so far
+        base_path, file_names = pending.base_path, pending.file_names
+        store = self._open_store(base_path, file_names)
+
+        if self.hyperparams['alignment'] == 'union':
+            # align series of differing lengths on the union of their timestamps
+            series = self._iter_series(base_path, file_names, store, start=pending.position)
+            for idx, times_values in progress.take(series):
+                pending.series.append(times_values)
+                pending.position = idx + 1
+            timestamps, timeseries_matrix = ragged.RaggedSeries.from_series(
+                enumerate(pending.series), len(pending.series), self.hyperparams['dtype']).to_dense()
+            return timestamps, timeseries_matrix.astype(self.hyperparams['dtype'], copy=False)
+
+        # take the matrix straight from a packed series store when its series all have the same length, advancing
+        # the position a series at a time so the deadline applies as when the files are parsed
+        window = self._window()
+        if store is not None and pending.matrix is None and not window.active and len(file_names) > 0:
+            positions = [store.positions[file_name] for file_name in file_names]
+            lengths = store.lengths(positions)
+            if np.all(lengths == lengths[0]):
+                n_taken = sum(1 for _ in progress.take(iter(range(pending.position, len(file_names)))))
+                store_matrix = store.matrix(positions[:pending.position + n_taken])
+                if store_matrix is not None:
+                    pending.position += n_taken
+                    timestamps = np.array(store.series(positions[0])[0])
+                    if np.may_share_memory(store_matrix, store.values):
+                        # a contiguous run is a view of the read only mapping, copied so the output can be written
+                        return timestamps, np.array(store_matrix, dtype=self.hyperparams['dtype'])
+                    return timestamps, store_matrix.astype(self.hyperparams['dtype'], copy=False)
+
+        # otherwise load each time series file directly into a preallocated series x timestamps matrix
+        times_from_first = self.hyperparams['parse_times'] == 'first' and not window.active
+        series = self._iter_series(base_path, file_names, store, times_from_first, pending.position)
+        self._assemble(progress.take(series), pending)
+        if pending.timestamps is None or pending.matrix is None:
+            return np.empty(0), np.empty((0, 0), dtype=self.hyperparams['dtype'])
+        return pending.timestamps, pending.matrix[:pending.position]
+
+    def _wrap_output(self, timeseries_dataframe: pd.DataFrame) -> container.DataFrame:
+        # wrap as a D3M container - every column shares the value type, so a single column entry describes them
+        if self.hyperparams['generate_metadata']:
+            return container.DataFrame(data=timeseries_dataframe, generate_metadata=True)
+
+        n_rows, n_columns = timeseries_dataframe.shape
+        dtype = timeseries_dataframe.dtypes.iloc[0] if n_columns else np.dtype(self.hyperparams['dtype'])
+        timeseries_dataframe = container.DataFrame(data=timeseries_dataframe, generate_metadata=False)
+        timeseries_dataframe.metadata = output_metadata.dataframe_metadata(
+            n_rows, all_columns={'structural_type': dtype.type}, n_columns=n_columns)
+        return timeseries_dataframe
+
+    def _window(self) -> downsample.SeriesWindow:
+        # the time range and downsampling applied to each series as it is parsed
+        return downsample.SeriesWindow(self.hyperparams['time_start'], self.hyperparams['time_end'],
+                                       self.hyperparams['stride'], self.hyperparams['aggregation'])
+
+    def _open_store(self,
+                    base_path: str,
+                    file_names: typing.Sequence[str]) -> typing.Optional[series_store.SeriesStore]:
+        # open the packed series store for the base path if it holds the requested series and columns, and they
+        # haven't changed since it was packed
+        store = series_store.SeriesStore.open(base_path)
+        if store is None or not store.covers(file_names, self.hyperparams['time_col_index'],
+                                             self.hyperparams['value_col_index'],
+                                             self.hyperparams['store_check'] == 'files'):
+            return None
+        return store
+
+    def _iter_series(self,
+                     base_path: str,
+                     file_names: typing.Sequence[str],
+                     store: typing.Optional[series_store.SeriesStore],
+                     times_from_first: bool = False,
+                     start: int = 0) -> SeriesIterator:
+        # yield (position, (times, values)) for each of the series files from the start position onwards,
+        # reading them from the store when there is one
+        window = self._window()
+        if store is not None:
+            return ((idx, window.apply(*store.series(store.positions[file_names[idx]])))
+                    for idx in range(start, len(file_names)))
+
+        time_index = self.hyperparams['time_col_index']
+        value_index = self.hyperparams['value_col_index']
+        dtype = self.hyperparams['dtype']
+        csv_paths = [os.path.join(base_path, file_name) for file_name in file_names]
+        cache_spec = 'time={time_index},value={value_index},dtype={dtype}{window}'.format(
+            time_index=time_index, value_index=value_index, dtype=dtype, window=window.spec())
+        if times_from_first and len(csv_paths) > 1 and self._snapshots is None:
+            return self._iter_verified_series(csv_paths, cache_spec, start)
+
+        read_fn = functools.partial(_read_series, time_index=time_index, value_index=value_index, dtype=dtype,
+                                    window=window)
+        return self._iter_read(base_path, csv_paths, read_fn, cache_spec, start)
+
+    def _iter_verified_series(self,
+                              csv_paths: typing.Sequence[str],
+                              cache_spec: str,
+                              start: int = 0) -> SeriesIterator:
+        # parse the times of the first file only, and check that the other files have matching time fingerprints.
+        # The first file is always read, as it is the reference for the files from the start position onwards
+        time_index = self.hyperparams['time_col_index']
         value_index = self.hyperparams['value_col_index']
+        dtype = self.hyperparams['dtype']
+
+        timestamps, values = _read_series(csv_paths[0], time_index, value_index, dtype)
+        fingerprint = _time_fingerprint(csv_paths[0], time_index, len(values))
+        self._read_stats.requested += 1
+        self._read_stats.read += 1
+        if start == 0:
+            yield 0, (timestamps, values)
+
+        offset = max(start, 1)
+        read_fn = functools.partial(_read_values, time_index=time_index, value_index=value_index, dtype=dtype)
+        series = series_reader.iter_read(csv_paths[offset:], read_fn, self.hyperparams['workers'],
+                                         self.hyperparams['parallel_backend'], self._series_cache,
+                                         cache_spec + ',fingerprint', self._read_stats, self._profile)
+        try:
+            for idx, (series_fingerprint, values) in series:
+                if not np.array_equal(series_fingerprint, fingerprint):
+                    raise exceptions.InvalidArgumentValueError('timestamps in file ' + csv_paths[idx + offset]
+                                                               + ' do not match the first series file - consider '
+                                                               + 'setting alignment to \'union\'')
+                yield idx + offset, (timestamps, values)
+        finally:
+            series.close()
+
+    def _iter_channels(self,
+                       base_path: str,
+                       file_names: typing.Sequence[str],
+                       value_indices: typing.Sequence[int]) -> SeriesIterator:
+        # yield (position, (times, values)) for each of the series files, with a column of values per channel
         time_index = self.hyperparams['time_col_index']
+        dtype = self.hyperparams['dtype']
+        window = self._window()
+        csv_paths = [os.path.join(base_path, file_name) for file_name in file_names]
+        cache_spec = 'time={time_index},values={value_indices},dtype={dtype}{window}'.format(
+            time_index=time_index, value_indices=';'.join(str(index) for index in value_indices), dtype=dtype,
+            window=window.spec())
+
+        read_fn = functools.partial(_read_channels, time_index=time_index, value_indices=tuple(value_indices),
+                                    dtype=dtype, window=window)
+        return self._iter_read(base_path, csv_paths, read_fn, cache_spec)
+
+    def _iter_read(self,
+                   base_path: str,
+                   csv_paths: typing.List[str],
+                   read_fn: typing.Callable[[str], typing.Tuple[np.ndarray, np.ndarray]],
+                   cache_spec: str,
+                   start: int = 0) -> SeriesIterator:
+        # read the series files from the start position onwards - when loading incrementally, series unchanged
+        # since the last call are taken from its snapshot and only the other files are parsed
+        if self._snapshots is None:
+            series = series_reader.iter_read(csv_paths[start:], read_fn, self.hyperparams['workers'],
+                                             self.hyperparams['parallel_backend'], self._series_cache, cache_spec,
+                                             self._read_stats, self._profile)
+            if start == 0:
+                return series
+            return ((idx + start, times_values) for idx, times_values in series)
+
+        # a resumed load carries on with the incremental read it started with
+        if start == 0 or self._incremental is None or self._incremental.paths != csv_paths:
+            self._incremental = self._snapshots.open(base_path, cache_spec, csv_paths)
+        self._read_stats.reused += self._incremental.n_unchanged(start)
+        series = series_reader.iter_read(self._incremental.changed_paths(start), read_fn, self.hyperparams['workers'],
+                                         self.hyperparams['parallel_backend'], self._series_cache, cache_spec,
+                                         self._read_stats, self._profile)
+        # the snapshot is keyed by the cache spec, so the series it holds are (times, values) tuples like those parsed
+        return typing.cast(SeriesIterator, self._incremental.merge(series, start))
+
+    def _save_incremental(self) -> None:
+        # save the series of a completed incremental load as the snapshot for the next call
+        if self._incremental is not None:
+            self._incremental.save()
+            self._incremental = None
+
+    def _load_ragged(self, base_path: str, file_names: typing.Sequence[str]) -> ragged.RaggedSeries:
+        store = self._open_store(base_path, file_names)
+        return ragged.RaggedSeries.from_series(self._iter_series(base_path, file_names, store), len(file_names),
+                                               self.hyperparams['dtype'])
+
+    def _assemble(self, series: SeriesIterator, pending: '_PendingLoad') -> None:
+        # copy the (position, (times, values)) series into the preallocated series x timestamps matrix of the load,
+        # which gains a trailing channel axis when the values have a column per channel
+        for idx, (times, values) in series:
+            # use the time values from the first file as the column headers
+            if pending.matrix is None:
+                pending.timestamps = times
+                pending.matrix = np.empty((len(pending.file_names), len(times)) + values.shape[1:],
+                                          dtype=self.hyperparams['dtype'])
+
+            if len(values) > pending.matrix.shape[1]:
+                raise exceptions.InvalidArgumentValueError('file ' + pending.file_names[idx] + ' contains more '
+                                                           + 'timestamps than the first series file')
+            pending.matrix[idx, :len(values)] = values
+            pending.matrix[idx, len(values):] = np.nan
+            pending.position = idx + 1
+
+
+class _PendingLoad:
+    # the progress of a load across produce calls, which is resumed while the same inputs are passed in
+    def __init__(self, inputs: container.DataFrame, base_path: str, file_names: typing.List[str]) -> None:
+        self.inputs = inputs
+        self.base_path = base_path
+        self.file_names = file_names
+        self.position = 0
+        self.timestamps: typing.Optional[np.ndarray] = None
+        self.matrix: typing.Optional[np.ndarray] = None
+        self.series: typing.List[typing.Tuple[np.ndarray, np.ndarray]] = []
+
+
+def _read_series(csv_path: str,
+                 time_index: int,
+                 value_index: int,
+                 dtype: str,
+                 window: downsample.SeriesWindow = downsample.NO_WINDOW) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # parse only the time and value columns of a series file, converting values straight to the output type
+    columns = sorted({time_index, value_index})
+    with series_source.open_series(csv_path) as source:
+        series = window.read_csv(source, columns.index(time_index), usecols=columns, dtype={value_index: dtype})
+    return series.iloc[:, columns.index(time_index)].values, series.iloc[:, columns.index(value_index)].values
+
+
+def _read_channels(csv_path: str,
+                   time_index: int,
+                   value_indices: typing.Sequence[int],
+                   dtype: str,
+                   window: downsample.SeriesWindow = downsample.NO_WINDOW) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # parse the time column and several value columns of a series file, returning a (timestamps, channels) array
+    columns = sorted({time_index}.union(value_indices))
+    with series_source.open_series(csv_path) as source:
+        series = window.read_csv(source, columns.index(time_index), usecols=columns,
+                                 dtype={value_index: dtype for value_index in value_indices})
+    values = series.iloc[:, [columns.index(value_index) for value_index in value_indices]].values
+    return series.iloc[:, columns.index(time_index)].values, values
+
+
+def _read_values(csv_path: str, time_index: int, value_index: int, dtype: str) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # parse only the value column of a series file, returning a fingerprint of its times in place of the times
+    with series_source.open_series(csv_path) as source:
+        values = pd.read_csv(source, usecols=[value_index], dtype={value_index: dtype}).iloc[:, 0].values
+    return _time_fingerprint(csv_path, time_index, len(values)), values
+
+
+def _time_fingerprint(csv_path: str, time_index: int, n_rows: int) -> np.ndarray:
+    # the row count plus the raw text of the first and last timestamps, taken from the ends of a local file
+    # without parsing it - compressed, archived and remote files fall back to parsing the time column
+    location = series_source.locate(csv_path)
+    if not location.plain or location.path is None:
+        with series_source.open_series(csv_path) as source:
+            times = pd.read_csv(source, usecols=[time_index]).iloc[:, 0].values
+        bounds = [str(times[0]), str(times[-1])] if len(times) else ['', '']
+        return np.array([str(n_rows)] + bounds)
 
-        # load each time series file, transpose, and append
-        base_path = inputs.metadata.query((metadata_base.ALL_ELEMENTS, file_index))['location_base_uris'][0]
-        timeseries_dataframe: pd.DataFrame
-        for idx, file_path in enumerate(inputs.iloc[:, file_index]):
-            csv_path = os.path.join(base_path, file_path)
-            timeseries_row = pd.read_csv(csv_path).transpose()
-            # use the time values as the column headers
-            if idx is 0:
-                timeseries_dataframe = pd.DataFrame(columns=timeseries_row.iloc[time_index])
+    with open(location.path, 'rb') as csv_file:
+        csv_file.readline()
+        first_line = csv_file.readline()
+        csv_file.seek(0, os.SEEK_END)
+        csv_file.seek(max(0, csv_file.tell() - 4096))
+        tail_lines = [line for line in csv_file.read().splitlines() if line.strip()]
+    last_line = tail_lines[-1] if tail_lines and first_line.strip() else b''
 
-            timeseries_dataframe = timeseries_dataframe.append(timeseries_row.iloc[value_index])
+    return np.array([str(n_rows), _csv_field(first_line, time_index), _csv_field(last_line, time_index)])
 
-        # get the index to use a range of ints rather than the value col name
-        timeseries_dataframe = timeseries_dataframe.reset_index(drop=True)
 
-        # wrap as a D3M container - metadata should be auto generated
-        return base.CallResult(container.DataFrame(data=timeseries_dataframe))
+def _csv_field(line: bytes, index: int) -> str:
+    fields = line.decode('utf-8', errors='replace').strip().split(',')
+    return fields[index].strip() if index < len(fields) else ''